@@ -0,0 +1,244 @@
+"""
+Solve many puzzles at once across several processes.
+
+Works on clue strings directly instead of Board/Puzzle so nothing is read from or written to
+save data and save_manager is never imported (it only allows one process to import it).
+"""
+
+from collections import deque
+from collections.abc import Generator, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import Optional
+import os
+import sys
+
+import numpy as np
+import numpy.typing as npt
+
+import super_sudoku_solver.bitboard_solver as bitboard
+import super_sudoku_solver.np_propagation as np_propagation
+import super_sudoku_solver.sudoku_matrix as sudoku_matrix
+
+from super_sudoku_solver.custom_types import Cells, Engine
+from super_sudoku_solver.sizes import format_cells, parse_clues
+
+
+@dataclass(frozen=True)
+class Result:
+    """
+    Attributes:
+        index: position of the puzzle in the puzzles given
+        clues: the puzzle as given
+        solution: solved puzzle in the same format as clues. None if it could not be solved.
+        error: why the puzzle could not be solved. None if it was solved.
+    """
+
+    index: int
+    clues: str
+    solution: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _generate_solutions(
+    cells: Cells, engine: Engine
+) -> Generator[npt.NDArray[np.int8], None, None]:
+    if engine == "bitboard":
+        yield from bitboard.generate_solutions(cells)
+    elif engine == "dlx":
+        matrix = sudoku_matrix.create_matrix(cells)
+        if matrix is None:
+            return
+        for rows in matrix.generate_solution_rows():
+            yield sudoku_matrix.extract(cells, rows)
+    else:
+        raise ValueError("Invalid engine")
+
+
+def _solve_cells(cells: Cells, engine: Engine) -> Cells:
+    """
+    Returns:
+        The only solution of cells
+    Raises:
+        ValueError: cells don't have exactly one solution
+    """
+    solutions = _generate_solutions(cells, engine)
+
+    solution = next(solutions, None)
+    if solution is None:
+        raise ValueError("Puzzle has no solutions")
+    if next(solutions, None) is not None:
+        raise ValueError("Puzzle has multiple solutions")
+
+    return solution
+
+
+def solve_clues(clues: str, engine: Engine = "bitboard") -> str:
+    """
+    Args:
+        clues: puzzle to solve
+        engine: solver to use
+    Returns:
+        The solution in the same format as clues
+    Raises:
+        ValueError: clues are invalid or the puzzle doesn't have exactly one solution
+    """
+    return format_cells(_solve_cells(parse_clues(clues), engine))
+
+
+def _solve_chunk(
+    chunk: list[tuple[int, str]], engine: Engine, propagate: bool = True
+) -> list[Result]:
+    """
+    Runs in worker processes so must be picklable (defined at module level).
+    Args:
+        chunk: (index, clues) of each puzzle to solve
+        propagate: fill singles on the whole chunk at once with np_propagation before searching
+    Returns:
+        Result for every puzzle in chunk in the same order
+    """
+    results: list[Optional[Result]] = [None] * len(chunk)
+
+    parsed: list[tuple[int, Cells]] = []
+    for position, (index, clues) in enumerate(chunk):
+        try:
+            parsed.append((position, parse_clues(clues)))
+        except ValueError as e:
+            results[position] = Result(index, clues, error=str(e))
+
+    # Boards can only be stacked with others of the same size
+    by_size: dict[int, list[tuple[int, Cells]]] = {}
+    for position, cells in parsed:
+        by_size.setdefault(cells.shape[0], []).append((position, cells))
+
+    for group in by_size.values():
+        boards = np.stack([cells for _, cells in group])
+        invalid = np.zeros(len(group), dtype=np.bool)
+        solved = np.zeros(len(group), dtype=np.bool)
+        if propagate:
+            # Singles are forced so the propagated boards have the same solutions as the originals
+            boards, _, invalid = np_propagation.propagate(boards)
+            # Only a board propagation found no contradiction in is solved just by being full.
+            # Without propagation full boards still go through engine to be checked.
+            solved = (boards != -1).all(axis=(1, 2)) & ~invalid
+
+        for (position, _), cells, is_invalid, is_solved in zip(
+            group, boards, invalid.tolist(), solved.tolist()
+        ):
+            index, clues = chunk[position]
+            if is_invalid:
+                results[position] = Result(
+                    index, clues, error="Puzzle has no solutions"
+                )
+            elif is_solved:
+                # Only forced moves were made so this is the only solution
+                results[position] = Result(index, clues, solution=format_cells(cells))
+            else:
+                try:
+                    solution = format_cells(_solve_cells(cells, engine))
+                    results[position] = Result(index, clues, solution=solution)
+                except ValueError as e:
+                    results[position] = Result(index, clues, error=str(e))
+
+    return [result for result in results if result is not None]
+
+
+def _chunks(
+    puzzles: Iterable[str], chunksize: int
+) -> Generator[list[tuple[int, str]], None, None]:
+    """
+    Lazily split puzzles into lists of (index, clues) so they don't all have to be in memory.
+    """
+    iterator = enumerate(puzzles)
+    while chunk := list(islice(iterator, chunksize)):
+        yield chunk
+
+
+def solve_many(
+    puzzles: Iterable[str],
+    workers: Optional[int] = None,
+    engine: Engine = "bitboard",
+    ordered: bool = True,
+    chunksize: int = 256,
+    propagate: bool = True,
+) -> Generator[Result, None, None]:
+    """
+    Solve puzzles in parallel. Results are streamed so puzzles can be any size iterable.
+    Args:
+        puzzles: clue strings
+        workers: number of processes. None for one per CPU, 1 to solve in this process.
+        engine: solver to use
+        ordered: True to yield results in the order of puzzles, False to yield them as soon as they are solved.
+        chunksize: number of puzzles sent to a worker at a time
+        propagate: fill singles on every puzzle in a chunk at once with np_propagation so engine only searches what is left
+    Yields:
+        Result for every puzzle. Puzzles that can't be solved have Result.error set instead of raising.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1")
+
+    chunks = _chunks(puzzles, chunksize)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from _solve_chunk(chunk, engine, propagate)
+        return
+
+    if workers is None:
+        workers = os.process_cpu_count() or 1
+
+    # Enough chunks in flight to keep every worker busy without reading all of puzzles up front
+    max_pending = 2 * workers
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if ordered:
+            queue: deque[Future[list[Result]]] = deque()
+            for chunk in chunks:
+                queue.append(executor.submit(_solve_chunk, chunk, engine, propagate))
+                if len(queue) >= max_pending:
+                    yield from queue.popleft().result()
+            while queue:
+                yield from queue.popleft().result()
+        else:
+            pending: set[Future[list[Result]]] = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_solve_chunk, chunk, engine, propagate))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+    finally:
+        # Don't solve anything else if the caller stopped early
+        executor.shutdown(cancel_futures=True)
+
+
+def main(args) -> None:
+    """
+    Solve puzzles from a file (one per line) and print "clues solution" or "clues error: reason" for each.
+    """
+    failed = False
+    # Opened by argparse so a missing file is reported as a usage error
+    with args.file as file:
+        lines = (line.strip() for line in file)
+        for result in solve_many(
+            (line for line in lines if line),
+            workers=args.jobs,
+            engine=args.engine,
+            ordered=not args.unordered,
+            chunksize=args.chunksize,
+            propagate=not args.no_propagate,
+        ):
+            if result.error is None:
+                print(result.clues, result.solution)
+            else:
+                failed = True
+                print(result.clues, "error:", result.error)
+
+    if failed:
+        sys.exit(1)
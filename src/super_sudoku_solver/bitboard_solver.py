@@ -0,0 +1,322 @@
+"""
+Sudoku specific solver using bitmasks.
+
+Much faster than dlx_solver for sudoku but it can't solve anything else.
+dlx_solver stays the reference so anything this finds should match it.
+
+Each house (row, column or box) has an n bit int where bit v is set if v is already in the house.
+Each cell has an n bit int of the values it can still be which is kept up to date as values are placed.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+from collections.abc import Generator
+from functools import cache
+from typing import NamedTuple, Optional
+
+from super_sudoku_solver.custom_types import Cells
+from super_sudoku_solver.sizes import box_size
+
+
+class _Tables(NamedTuple):
+    """
+    Lookup tables for one board size. Cells are numbered row after row.
+    Houses 0 to n-1 are rows, n to 2n-1 columns and 2n to 3n-1 boxes.
+
+    Attributes:
+        full: mask with every value set
+        row_of, column_of, box_of: index of each house a cell is in
+        houses: cells in each house
+        peers: cells that share a house with each cell (not including the cell itself)
+    """
+
+    full: int
+    row_of: tuple[int, ...]
+    column_of: tuple[int, ...]
+    box_of: tuple[int, ...]
+    houses: tuple[tuple[int, ...], ...]
+    peers: tuple[tuple[int, ...], ...]
+
+
+@cache
+def _tables(size: int) -> _Tables:
+    """
+    Returns:
+        Tables for a board of size. Built once per size.
+    """
+    box = box_size(size)
+    area = size * size
+
+    row_of = tuple(cell // size for cell in range(area))
+    column_of = tuple(size + cell % size for cell in range(area))
+    box_of = tuple(
+        2 * size + box * (cell // (size * box)) + (cell % size) // box
+        for cell in range(area)
+    )
+
+    houses = tuple(
+        tuple(
+            cell
+            for cell in range(area)
+            if house in (row_of[cell], column_of[cell], box_of[cell])
+        )
+        for house in range(3 * size)
+    )
+
+    peers = tuple(
+        tuple(
+            sorted(
+                {
+                    peer
+                    for house in (row_of[cell], column_of[cell], box_of[cell])
+                    for peer in houses[house]
+                }
+                - {cell}
+            )
+        )
+        for cell in range(area)
+    )
+
+    return _Tables((1 << size) - 1, row_of, column_of, box_of, houses, peers)
+
+
+# State of a partially solved board: (grid, used, candidates)
+# grid is the value in each cell (-1 if empty), used is the mask for each house
+# and candidates is the mask for each cell (0 once the cell is filled).
+type _State = tuple[list[int], list[int], list[int]]
+
+
+def _place(
+    tables: _Tables, state: _State, cell: int, digit: int, singles: list[int]
+) -> bool:
+    """
+    Put digit in cell and remove it as a candidate from every peer.
+    Args:
+        state: modified in place
+        singles: peers left with one candidate are appended to this
+    Returns:
+        False if digit is already used in one of the houses or a peer is left with no candidates
+    """
+    grid, used, candidates = state
+    bit = 1 << digit
+    row, column, box = tables.row_of[cell], tables.column_of[cell], tables.box_of[cell]
+    if (used[row] | used[column] | used[box]) & bit:
+        return False
+
+    grid[cell] = digit
+    candidates[cell] = 0
+    used[row] |= bit
+    used[column] |= bit
+    used[box] |= bit
+
+    for peer in tables.peers[cell]:
+        mask = candidates[peer]
+        if mask & bit:
+            mask ^= bit
+            candidates[peer] = mask
+            if mask == 0:
+                return False
+            if mask & (mask - 1) == 0:
+                singles.append(peer)
+    return True
+
+
+def _propagate(
+    tables: _Tables, state: _State, singles: list[int]
+) -> Optional[tuple[int, int]]:
+    """
+    Fill naked and hidden singles until there are none left. Modifies state in place.
+    Args:
+        singles: cells known to have exactly one candidate
+    Returns:
+        None if the board can't be solved.
+        (-1, 0) if the board is solved.
+        Otherwise (cell, candidates) for the empty cell with the fewest candidates.
+    """
+    grid, used, candidates = state
+    full = tables.full
+
+    while True:
+        # Naked singles
+        while singles:
+            cell = singles.pop()
+            if grid[cell] != -1:
+                continue
+            if not _place(
+                tables, state, cell, candidates[cell].bit_length() - 1, singles
+            ):
+                return None
+
+        # Hidden singles
+        for house, cells in enumerate(tables.houses):
+            once = 0  # values possible in at least one cell
+            twice = 0  # values possible in at least two cells
+            for cell in cells:
+                mask = candidates[cell]
+                twice |= once & mask
+                once |= mask
+
+            # A value that can't go anywhere in the house
+            if (once | used[house]) != full:
+                return None
+
+            hidden = once & ~twice
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+
+                for cell in cells:
+                    if candidates[cell] & bit:
+                        break
+                else:
+                    # Placing another hidden single in this house removed the only place it could go
+                    return None
+
+                if not _place(tables, state, cell, bit.bit_length() - 1, singles):
+                    return None
+
+        # Placing hidden singles can create naked singles
+        if singles:
+            continue
+
+        # Nothing left to propagate so find the cell to branch on
+        best = -1
+        best_count = len(tables.houses)  # More than any cell can have
+        for cell, mask in enumerate(candidates):
+            if mask and mask.bit_count() < best_count:
+                best = cell
+                best_count = mask.bit_count()
+                # Can't do better than 2 as singles have all been placed
+                if best_count == 2:
+                    break
+
+        if best == -1:
+            return -1, 0
+        return best, candidates[best]
+
+
+def _initial_state(
+    tables: _Tables, cells: Cells
+) -> tuple[Optional[_State], list[int]]:
+    """
+    Args:
+        cells: nxn array. -1 for empty cells.
+    Returns:
+        (state for cells, naked singles).
+        State is None if cells contradict each other.
+    """
+    grid: list[int] = np.asarray(cells).flatten().tolist()
+    used = [0] * len(tables.houses)
+    row_of, column_of, box_of = tables.row_of, tables.column_of, tables.box_of
+    for cell, digit in enumerate(grid):
+        if digit == -1:
+            continue
+        bit = 1 << digit
+        row, column, box = row_of[cell], column_of[cell], box_of[cell]
+        if (used[row] | used[column] | used[box]) & bit:
+            return None, []
+        used[row] |= bit
+        used[column] |= bit
+        used[box] |= bit
+
+    # PERF: cheaper to work out candidates from the houses once than to place each digit with _place
+    candidates = [0] * len(grid)
+    singles = []
+    for cell, digit in enumerate(grid):
+        if digit != -1:
+            continue
+        mask = tables.full & ~(
+            used[row_of[cell]] | used[column_of[cell]] | used[box_of[cell]]
+        )
+        if mask == 0:
+            return None, []
+        if mask & (mask - 1) == 0:
+            singles.append(cell)
+        candidates[cell] = mask
+
+    return (grid, used, candidates), singles
+
+
+def _search(
+    cells: Cells, max_nodes: Optional[int] = None
+) -> Generator[Optional[npt.NDArray[np.int8]], None, None]:
+    """
+    Args:
+        cells: nxn array. -1 for empty cells.
+        max_nodes: give up after propagating this many states. None to never give up.
+    Yields:
+        nxn array for every solution. None if it gave up, which is always the last thing yielded.
+    """
+    size = cells.shape[0]
+    tables = _tables(size)
+
+    initial, singles = _initial_state(tables, cells)
+    if initial is None:
+        return
+
+    # Depth first search using an explicit stack of (state, naked singles) still to try
+    stack = [(initial, singles)]
+    nodes = 0
+    while stack:
+        if nodes == max_nodes:
+            yield None
+            return
+        nodes += 1
+
+        state, singles = stack.pop()
+        result = _propagate(tables, state, singles)
+        if result is None:
+            continue
+
+        cell, mask = result
+        if cell == -1:
+            yield np.array(state[0], dtype=np.int8).reshape((size, size))
+            continue
+
+        # Branch on every candidate. Highest digit is pushed first so lowest is tried first.
+        while mask:
+            digit = mask.bit_length() - 1
+            mask ^= 1 << digit
+
+            grid, used, candidates = state
+            new: _State = (grid.copy(), used.copy(), candidates.copy())
+            new_singles: list[int] = []
+            if _place(tables, new, cell, digit, new_singles):
+                stack.append((new, new_singles))
+
+
+def generate_solutions(cells: Cells) -> Generator[npt.NDArray[np.int8], None, None]:
+    """
+    Args:
+        cells: nxn array. -1 for empty cells.
+    Yields:
+        nxn array for every solution
+    """
+    # Never gives up so never yields None
+    yield from _search(cells)  # type: ignore[misc]
+
+
+def count_solutions(
+    cells: Cells, limit: Optional[int] = 2, max_nodes: Optional[int] = None
+) -> Optional[int]:
+    """
+    Args:
+        cells: nxn array. -1 for empty cells.
+        limit: stop searching once this many solutions are found. None to count all of them.
+        max_nodes: give up after propagating this many states of the search. None to never give up.
+    Returns:
+        Number of solutions found (at most limit).
+        None if max_nodes ran out before the search finished or found limit solutions.
+    """
+    if limit is not None and limit <= 0:
+        return 0
+
+    count = 0
+    for solution in _search(cells, max_nodes):
+        if solution is None:
+            return None
+        count += 1
+        if count == limit:
+            break
+    return count
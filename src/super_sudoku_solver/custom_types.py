@@ -6,6 +6,9 @@ from typing import Literal
 
 type Adjacency = Literal["row", "column", "box"]
 
+# Solver used by Board
+type Engine = Literal["dlx", "bitboard"]
+
 # Values: [row, column]
 type Coord = np.ndarray[tuple[Literal[2]], np.dtype[np.int8]]
 
@@ -14,11 +17,11 @@ type Coords = np.ndarray[tuple[int, Literal[2]], np.dtype[np.int8]]
 # Values: [row, column, value]
 type Cell = np.ndarray[tuple[Literal[3]], np.dtype[np.int8]]
 
+# Every axis below has the board size as its length. 9 for a standard board, see sizes.
+
 # Indexes: [row, column]
-type Cells = np.ndarray[tuple[Literal[9], Literal[9]], np.dtype[np.int8]]
-type CellCandidates = np.ndarray[tuple[Literal[9]], np.dtype[np.bool]]
+type Cells = np.ndarray[tuple[int, int], np.dtype[np.int8]]
+type CellCandidates = np.ndarray[tuple[int], np.dtype[np.bool]]
 
 # Indexes: [value, row, column]
-type Candidates = np.ndarray[
-    tuple[Literal[9], Literal[9], Literal[9]], np.dtype[np.bool]
-]
+type Candidates = np.ndarray[tuple[int, int, int], np.dtype[np.bool]]
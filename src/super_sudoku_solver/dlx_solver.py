@@ -1,6 +1,17 @@
 """Solve exact cover problems using Knuth's algorithm DLX"""
 
-from typing import Generator, Optional
+import numpy as np
+import numpy.typing as npt
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain
+from random import Random
+from time import perf_counter
+from collections.abc import Callable, Collection
+from typing import Generator, Literal, Optional
 
 
 class Node:
@@ -100,6 +111,88 @@ class HeaderNode(Node):
         self.column = self
 
 
+@dataclass
+class SearchStats:
+    """
+    Counters recorded by a search when one is passed to it. Searches never record anything otherwise.
+    The same instance can be passed to several searches to add them together.
+
+    Attributes:
+        covers: number of times a column was covered
+        uncovers: number of times a column was uncovered
+        updates: number of nodes unlinked from or relinked into their column
+        choices: choices[d] is the number of times a column was chosen at depth d
+            (number of nodes in the search tree at that depth)
+        branches: branches[d] is the total number of rows in the columns chosen at depth d
+        max_depth: most rows in a partial solution
+        solutions: number of solutions found
+        time_to_first_solution: seconds from the start of the search to the first solution. None until one is found.
+    """
+
+    covers: int = 0
+    uncovers: int = 0
+    updates: int = 0
+    choices: list[int] = field(default_factory=list)
+    branches: list[int] = field(default_factory=list)
+    max_depth: int = 0
+    solutions: int = 0
+    time_to_first_solution: Optional[float] = None
+
+    @property
+    def nodes(self) -> int:
+        """
+        Number of nodes in the search tree. A cheap estimate of how hard the problem is.
+        """
+        return sum(self.choices)
+
+    def branching_factors(self) -> list[float]:
+        """
+        Returns:
+            Average number of rows tried at each depth
+        """
+        return [
+            branches / choices
+            for branches, choices in zip(self.branches, self.choices)
+        ]
+
+    def record_choice(self, depth: int, rows: int) -> None:
+        """
+        Args:
+            depth: level of the search a column was chosen at
+            rows: number of rows in that column
+        """
+        while len(self.choices) <= depth:
+            self.choices.append(0)
+            self.branches.append(0)
+        self.choices[depth] += 1
+        self.branches[depth] += rows
+
+    def record_depth(self, depth: int) -> None:
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def record_solution(self, start: float) -> None:
+        """
+        Args:
+            start: perf_counter() when the search started
+        """
+        self.solutions += 1
+        if self.time_to_first_solution is None:
+            self.time_to_first_solution = perf_counter() - start
+
+
+# How ArrayMatrix chooses the column to branch on:
+#     "mrv": scan every uncovered column for the one with the fewest rows (Knuth's S heuristic)
+#     "bucket": a column with the fewest rows from buckets of columns by size so it doesn't scan them all.
+#         Every update also moves a column between buckets, so it is only cheaper than "mrv"
+#         when there are many more columns than updates per cover. Ties may be broken differently.
+#     "first": the first uncovered column. Only sensible for small or very regular problems.
+#     Or a function taking (right, size) links of the search and returning the id of an uncovered header.
+type Heuristic = (
+    Literal["mrv", "bucket", "first"] | Callable[[list[int], list[int]], int]
+)
+
+
 class Matrix:
     """
     Attributes:
@@ -107,12 +200,18 @@ class Matrix:
             and regular nodes linked to those header nodes.
     """
 
-    def __init__(self, labels: list[int], rows: list[list[int]]) -> None:
+    def __init__(
+        self,
+        labels: list[int],
+        rows: list[list[int]],
+        secondary: Collection[int] = (),
+    ) -> None:
         """
         Args:
             labels: List with labels to identify each column
             rows: Each list in rows represents a row.
                 Each int in that list refers to a column.
+            secondary: labels of columns that can be covered at most once instead of exactly once
         """
         self.root: Node = Node()
 
@@ -122,6 +221,9 @@ class Matrix:
         # Root will be the first node in the structure
         prev = self.root
 
+        # PERF: a list would make every membership test below linear
+        secondary = set(secondary)
+
         # Create the column headers
         # Loop through each column and create links
         for label in labels:
@@ -130,6 +232,11 @@ class Matrix:
 
             column_header[label] = column
 
+            # Secondary columns are left linked to themselves so they are never chosen by the search
+            # but covering them still removes every other row with a node in them.
+            if label in secondary:
+                continue
+
             # Will start by linking first column to the root node
             # In subsequent iterations it will link to previous column
             column.left = prev
@@ -237,24 +344,29 @@ class Matrix:
         # Set column to left of current column to point to current column
         column.left.right = column
 
-    def _search(
-        self, solution: Optional[list[Node]] = None
-    ) -> Generator[list[Node], None, None]:
+    def _counted_cover(self, stats: SearchStats, column: HeaderNode) -> None:
         """
-        Recursive search algorithm to find exact cover solutions.
-        Args:
-            solution: List of rows in the (partial) solution
-        Yields:
-            List of rows consisting a solution
+        Same as _cover but records to stats
         """
-        if solution is None:
-            solution = []
+        stats.covers += 1
+        for column_node in column.down_sweep():
+            stats.updates += sum(1 for _ in column_node.right_sweep())
+        self._cover(column)
 
-        if self.root.right == self.root:
-            # If there are no columns to the right of root. Then all must be covered. So there is a solution.
-            yield solution
-            return
+    def _counted_uncover(self, stats: SearchStats, column: HeaderNode) -> None:
+        """
+        Same as _uncover but records to stats
+        """
+        stats.uncovers += 1
+        for column_node in column.up_sweep():
+            stats.updates += sum(1 for _ in column_node.left_sweep())
+        self._uncover(column)
 
+    def _smallest_column(self) -> HeaderNode:
+        """
+        Returns:
+            The first uncovered column with the fewest nodes
+        """
         size = float("inf")
         # Iterate over HeaderNodes
         smallest = None
@@ -267,29 +379,102 @@ class Matrix:
                 smallest = column  # type: ignore[attr-defined]
 
         assert smallest is not None, "_search() failed. No columns to cover."
+        return smallest  # type: ignore[return-value]
 
-        self._cover(smallest.column)
-
-        # Iterate over rows in column
-        for column_node in smallest.down_sweep():
-            # This will be added to solution later
-            x = column_node
+    def _search(
+        self, stats: Optional[SearchStats] = None, rng: Optional[Random] = None
+    ) -> Generator[tuple[list[Node], int], None, None]:
+        """
+        Iterative search algorithm to find exact cover solutions.
+        Each level of the search tree has one slot in a preallocated stack holding the row
+        currently chosen at that level, so nothing is copied until a solution is found.
+        Args:
+            stats: record counters to this. None to not record anything.
+            rng: try the rows of each chosen column in a random order from this. None to try them top to bottom.
+        Yields:
+            (stack, level) for each solution. stack[:level] are the rows consisting the solution.
+            stack is reused so it is only valid until the generator is resumed.
+        """
+        # PERF: counting is only done by separate methods so searches without stats don't pay for it
+        cover, uncover = self._cover, self._uncover
+        if stats is not None:
+            cover = partial(self._counted_cover, stats)
+            uncover = partial(self._counted_uncover, stats)
+        start = perf_counter()
+
+        # Every level covers at least one column so the search can't go deeper than the number of columns
+        stack: list[Node] = [self.root] * sum(1 for _ in self.root.right_sweep())
+        level = 0
+
+        # Only used with rng. orders[level] is the rows of the column chosen at level in the order to try them,
+        # ending with the header so running out of rows looks the same as reaching the header with down links.
+        orders: list[list[Node]] = [[]] * len(stack)
+        positions = [0] * len(stack)
+
+        while True:
+            # The row to try next at the current level. None if there is nothing to try.
+            row: Optional[Node]
+
+            if self.root.right is self.root:
+                # If there are no columns to the right of root. Then all must be covered. So there is a solution.
+                if stats is not None:
+                    stats.record_solution(start)
+                try:
+                    yield stack, level
+                except GeneratorExit:
+                    # Search was stopped early so uncover everything to leave the matrix as it was
+                    for chosen in reversed(stack[:level]):
+                        for node in chosen.left_sweep():
+                            uncover(node.column)
+                        uncover(chosen.column)
+                    raise
+                row = None
+            else:
+                smallest = self._smallest_column()
+                if stats is not None:
+                    stats.record_choice(level, smallest.size)
+                cover(smallest)
+                if rng is None:
+                    row = smallest.down
+                else:
+                    order = list(smallest.down_sweep())
+                    rng.shuffle(order)
+                    order.append(smallest)
+                    orders[level] = order
+                    positions[level] = 0
+                    row = order[0]
+
+            # Reaching the header means every row in the column has been tried so backtrack
+            while row is None or row is row.column:
+                if row is not None:
+                    uncover(row.column)
+
+                if level == 0:
+                    return
+                level -= 1
+
+                # Uncover all nodes that were covered when the row at this level was chosen.
+                # Direction is arbritrary but must be the opposite of the one used when covering columns
+                chosen = stack[level]
+                for node in chosen.left_sweep():
+                    uncover(node.column)
+
+                # Try the next row in the column
+                if rng is None:
+                    row = chosen.down
+                else:
+                    positions[level] += 1
+                    row = orders[level][positions[level]]
 
             # Iterate over nodes in row to cover all columns this row has nodes in
-            for node in column_node.right_sweep():
-                self._cover(node.column)
-
-            # Recursive call to search, extending the partial solution with x.
-            # `yield from` will yield all solutions this recursive call yields.
-            yield from self._search(solution=solution + [x])
+            for node in row.right_sweep():
+                cover(node.column)
 
-            # Uncover all nodes that we just covered.
-            # Direction is arbritrary but must be the opposite of the one used when covering columns
-            for j in column_node.left_sweep():
-                self._uncover(j.column)
-
-        # Backtrack
-        self._uncover(smallest.column)
+            # Go down a level, extending the partial solution with row.
+            stack[level] = row
+            level += 1
+            if stats is not None:
+                stats.record_depth(level)
 
     def _get_row_labels(self, node: Node) -> list[int]:
         """
@@ -307,12 +492,1143 @@ class Matrix:
 
         return labels
 
-    def generate_solutions(self) -> Generator[list[list[int]], None, None]:
+    def generate_solutions(
+        self, stats: Optional[SearchStats] = None, rng: Optional[Random] = None
+    ) -> Generator[list[list[int]], None, None]:
         """Wrapper for the search method
 
+        Args:
+            stats: record counters to this. None to not record anything.
+            rng: find solutions in a random order from this. None for the same order every time.
         Yields:
             All possible exact cover matrices.
             Gives each row as an array of their Node's column label.
         """
-        for solution in self._search():
-            yield [self._get_row_labels(s) for s in solution]
+        for stack, level in self._search(stats, rng):
+            yield [self._get_row_labels(stack[i]) for i in range(level)]
+
+    def count_solutions(
+        self, limit: Optional[int] = 2, stats: Optional[SearchStats] = None
+    ) -> int:
+        """
+        Count solutions without building them.
+        Args:
+            limit: stop searching once this many solutions are found. None to count all of them.
+            stats: record counters to this. None to not record anything.
+        Returns:
+            Number of solutions found (at most limit)
+        """
+        return _count(self._search(stats), limit)
+
+
+class ArrayMatrix:
+    """
+    Same algorithm as Matrix but every link is stored in flat integer arrays indexed by node id
+    instead of in one Python object per node.
+
+    Node ids:
+        0 is the root.
+        1 to len(labels) inclusive are the column headers (in the order of labels).
+        Everything after that are the nodes of the rows, stored row after row.
+        The last node is the secondary root. Secondary column headers are linked into a circular list
+        through it instead of through the root so the search never chooses them.
+
+    Attributes:
+        left, right, up, down: link arrays. left[n] is the id of the node to the left of node n, etc.
+        column: column[n] is the id of the header of the column node n is in. Headers point to themselves.
+        row: row[n] is the index (in the rows given) of the row node n is in. -1 for roots and headers.
+        row_start: row_start[r] is the id of the first node in row r. row_start[-1] is one past the last row node.
+        size: size[h] is the number of nodes in the column with header h. Only meaningful for headers.
+        labels: labels[h] is the label of header h. labels[0] is None as it belongs to the root.
+    """
+
+    # PERF: same reasoning as Node.__slots__
+    __slots__ = (
+        "left",
+        "right",
+        "up",
+        "down",
+        "column",
+        "row",
+        "row_start",
+        "size",
+        "labels",
+    )
+
+    def __init__(
+        self,
+        labels: list[int],
+        rows: list[list[int]],
+        secondary: Collection[int] = (),
+    ) -> None:
+        """
+        Args:
+            labels: List with labels to identify each column
+            rows: Each list in rows represents a row.
+                Each int in that list refers to a column.
+            secondary: labels of columns that can be covered at most once instead of exactly once
+        """
+        # Maps labels to the id of their header
+        header_id = {label: i + 1 for i, label in enumerate(labels)}
+
+        # Column header id of each node in the rows. Flattened so a row is a slice of it.
+        # PERF: map() over builtins avoids running a Python generator frame per node
+        node_column = np.fromiter(
+            map(header_id.__getitem__, chain.from_iterable(rows)), dtype=np.intc
+        )
+        row_lengths = np.fromiter(map(len, rows), dtype=np.intc, count=len(rows))
+        # PERF: a list would make every membership test linear
+        secondary = set(secondary)
+        is_secondary = np.fromiter(
+            (label in secondary for label in labels), dtype=np.bool, count=len(labels)
+        )
+
+        self._link(len(labels), node_column, row_lengths, is_secondary)
+        self.labels: list[Optional[int]] = [None, *labels]
+
+    @classmethod
+    def from_csr(
+        cls,
+        indptr: npt.ArrayLike,
+        indices: npt.ArrayLike,
+        num_columns: int,
+        labels: Optional[list[int]] = None,
+        secondary: Optional[npt.ArrayLike] = None,
+    ) -> ArrayMatrix:
+        """
+        Build a matrix from compressed sparse row arrays (as used by scipy.sparse.csr_array)
+        so no Python list is made per row or node. Use this for large problems.
+        Args:
+            indptr: (rows + 1,) row r has nodes in columns indices[indptr[r]:indptr[r + 1]]
+            indices: column index (position in labels) of every node, row after row
+            num_columns: number of columns
+            labels: label of each column. Defaults to the column index.
+            secondary: indexes of columns that can be covered at most once instead of exactly once
+        Raises:
+            ValueError: arrays are inconsistent with each other
+        """
+        indptr = np.asarray(indptr)
+        indices = np.asarray(indices)
+
+        if labels is None:
+            labels = list(range(num_columns))
+        if len(labels) != num_columns:
+            raise ValueError("labels must have num_columns elements")
+        if indptr.ndim != 1 or indptr.size == 0 or indices.ndim != 1:
+            raise ValueError("indptr and indices must be 1d and indptr can't be empty")
+        if (
+            indptr[0] != 0
+            or indptr[-1] != indices.size
+            or (np.diff(indptr) < 0).any()
+        ):
+            raise ValueError("indptr must be non-decreasing from 0 to len(indices)")
+        if indices.size and (indices.min() < 0 or indices.max() >= num_columns):
+            raise ValueError("indices must be between 0 and num_columns - 1")
+
+        is_secondary = np.zeros(num_columns, dtype=np.bool)
+        if secondary is not None:
+            is_secondary[np.asarray(secondary, dtype=np.intp)] = True
+
+        matrix = object.__new__(cls)
+        matrix._link(
+            num_columns,
+            (indices + 1).astype(np.intc),
+            np.diff(indptr).astype(np.intc),
+            is_secondary,
+        )
+        matrix.labels = [None, *labels]
+        return matrix
+
+    def _link(
+        self,
+        num_columns: int,
+        node_column: npt.NDArray[np.intc],
+        row_lengths: npt.NDArray[np.intc],
+        is_secondary: npt.NDArray[np.bool],
+    ) -> None:
+        """
+        Build every link array. Done with whole-array operations so no per-node Python code runs.
+        Args:
+            num_columns: number of columns (excluding the root)
+            node_column: header id for each node in the rows, in row order
+            row_lengths: number of nodes in each row
+            is_secondary: (num_columns,) True for secondary columns
+        """
+        first = num_columns + 1  # id of first node in rows
+        secondary_root = first + node_column.size
+        num_nodes = secondary_root + 1
+        ids = np.arange(num_nodes, dtype=np.intc)
+
+        left = ids - 1
+        right = ids + 1
+        up = ids.copy()
+        down = ids.copy()
+        column = ids.copy()
+        row = np.full(num_nodes, -1, dtype=np.intc)
+
+        # Root and primary headers form one circular list, secondary root and secondary headers another.
+        # Having a root in both means a header is only linked to itself once it has been covered.
+        headers = ids[1:first]
+        for ring in (
+            np.concatenate(([0], headers[~is_secondary])),
+            np.concatenate(([secondary_root], headers[is_secondary])),
+        ):
+            left[ring] = np.roll(ring, 1)
+            right[ring] = np.roll(ring, -1)
+
+        # Each row is its own circular list
+        ends = first + np.cumsum(row_lengths, dtype=np.intc)
+        starts = ends - row_lengths
+        non_empty = row_lengths > 0
+        left[starts[non_empty]] = ends[non_empty] - 1
+        right[ends[non_empty] - 1] = starts[non_empty]
+        row[first:secondary_root] = np.repeat(
+            np.arange(row_lengths.size, dtype=np.intc), row_lengths
+        )
+        column[first:secondary_root] = node_column
+
+        # Each column is a circular list through its header
+        self.column = _to_array(column)
+        self._link_columns(ids[first:secondary_root], up, down)
+
+        size = np.zeros(num_nodes, dtype=np.intc)
+        size[: num_columns + 1] = np.bincount(node_column, minlength=num_columns + 1)
+
+        # PERF: indexing numpy arrays one element at a time is slow so the search uses array.array
+        self.left = _to_array(left)
+        self.right = _to_array(right)
+        self.up = _to_array(up)
+        self.down = _to_array(down)
+        self.row = _to_array(row)
+        self.row_start = _to_array(np.append(starts, secondary_root))
+        self.size = _to_array(size)
+
+    def _link_columns(
+        self,
+        nodes: npt.NDArray[np.intc],
+        up: npt.NDArray[np.intc],
+        down: npt.NDArray[np.intc],
+    ) -> None:
+        """
+        Link nodes into a circular list through the header of each of their columns.
+        Headers of columns without any of the nodes are left unchanged.
+        Args:
+            nodes: ids of the row nodes to link in increasing order
+            up, down: link arrays modified in place
+        """
+        node_column = np.frombuffer(self.column, np.intc)
+
+        # A stable sort keeps nodes in the same column in the order their rows were given
+        order = nodes[np.argsort(node_column[nodes], kind="stable")]
+        order_column = node_column[order]
+        # True for the first node of each column in order
+        new_column = np.ones(order.size, dtype=np.bool)
+        new_column[1:] = order_column[1:] != order_column[:-1]
+        # True for the last node of each column in order
+        end_column = np.ones(order.size, dtype=np.bool)
+        end_column[:-1] = new_column[1:]
+
+        above = np.empty_like(order)
+        above[1:] = order[:-1]
+        above[new_column] = order_column[new_column]
+        below = np.empty_like(order)
+        below[:-1] = order[1:]
+        below[end_column] = order_column[end_column]
+
+        up[order] = above
+        down[order] = below
+        down[order_column[new_column]] = order[new_column]
+        up[order_column[end_column]] = order[end_column]
+
+    def copy(self) -> ArrayMatrix:
+        """
+        Returns:
+            Matrix that can be covered independently of this one.
+            Arrays that never change (column, row, row_start and labels) are shared.
+        """
+        new = object.__new__(ArrayMatrix)
+        # PERF: slicing an array.array is a single memcpy
+        new.left = self.left[:]
+        new.right = self.right[:]
+        new.up = self.up[:]
+        new.down = self.down[:]
+        new.size = self.size[:]
+        new.column = self.column
+        new.row = self.row
+        new.row_start = self.row_start
+        new.labels = self.labels
+        return new
+
+    def select(self, row: int) -> bool:
+        """
+        Force a row to be part of every solution by covering every column it has a node in.
+        Args:
+            row: index of the row in the rows given
+        Returns:
+            False if the row shares a column with a row already selected. Matrix is left unchanged when this happens.
+        """
+        left, right, node_column = self.left, self.right, self.column
+        start, end = self.row_start[row], self.row_start[row + 1]
+
+        for node in range(start, end):
+            column = node_column[node]
+            # Covered columns are skipped over by their neighbours
+            if right[left[column]] != column:
+                return False
+
+        for node in range(start, end):
+            self._cover(node_column[node])
+        return True
+
+    def select_rows(self, rows: npt.ArrayLike) -> bool:
+        """
+        Same as select() for every row in rows but with whole-array operations instead of
+        covering each column in Python. Use this to select many rows at once.
+        Args:
+            rows: indexes of the rows in the rows given
+        Returns:
+            False if two of the rows share a column or one shares a column with a row already selected.
+            Matrix is left unchanged when this happens.
+        """
+        # PERF: views of the arrays so they are changed in place without copying
+        left, right = np.frombuffer(self.left, np.intc), np.frombuffer(self.right, np.intc)
+        up, down = np.frombuffer(self.up, np.intc), np.frombuffer(self.down, np.intc)
+        size = np.frombuffer(self.size, np.intc)
+        node_column = np.frombuffer(self.column, np.intc)
+        node_row = np.frombuffer(self.row, np.intc)
+        row_start = np.frombuffer(self.row_start, np.intc)
+
+        first = len(self.labels)  # id of first node in rows
+        last = len(self.left) - 1  # id of the secondary root, one past the last node in rows
+        headers = np.arange(1, first, dtype=np.intc)
+
+        # Ids of the nodes in the rows
+        rows = np.asarray(rows, dtype=np.intp)
+        starts, lengths = row_start[rows], row_start[rows + 1] - row_start[rows]
+        nodes = np.arange(lengths.sum(), dtype=np.intc) + np.repeat(
+            starts - np.cumsum(lengths) + lengths, lengths
+        )
+        selected = node_column[nodes]
+
+        # Covered columns are skipped over by their neighbours
+        covered = np.zeros(first, dtype=np.bool)
+        covered[headers] = right[left[headers]] != headers
+        if (
+            covered[selected].any()
+            or np.bincount(selected, minlength=first).max(initial=0) > 1
+        ):
+            return False
+
+        # Header links only change for the newly covered columns so unlink them one at a time like _cover.
+        # PERF: on the array.arrays as indexing numpy arrays one element at a time is slow
+        header_left, header_right = self.left, self.right
+        for column in selected.tolist():
+            header_right[header_left[column]] = header_right[column]
+            header_left[header_right[column]] = header_left[column]
+        covered[selected] = True
+
+        # A row with a node in a covered column has had all its nodes removed from their columns.
+        # Every other row is untouched, so the columns can be linked again from just those rows.
+        removed = np.zeros(len(self.row_start) - 1, dtype=np.bool)
+        removed[node_row[first:last][covered[node_column[first:last]]]] = True
+        kept = np.flatnonzero(~removed[node_row[first:last]]).astype(np.intc) + first
+
+        # Columns whose nodes have all been removed link to themselves
+        uncovered = headers[~covered[1:]]
+        up[uncovered] = uncovered
+        down[uncovered] = uncovered
+        size[uncovered] = 0
+        self._link_columns(kept, up, down)
+        size[:first] += np.bincount(node_column[kept], minlength=first).astype(np.intc)
+        return True
+
+    def _cover(self, column: int) -> None:
+        """
+        Args:
+            column: The header id of the column to cover
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        node_column, size = self.column, self.size
+
+        right[left[column]] = right[column]
+        left[right[column]] = left[column]
+
+        i = down[column]
+        while i != column:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[node_column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, column: int) -> None:
+        """
+        Args:
+            column: The header id of the column to uncover
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        node_column, size = self.column, self.size
+
+        # Goes in opposite direction to _cover() for both column and row traversals.
+        i = up[column]
+        while i != column:
+            j = left[i]
+            while j != i:
+                size[node_column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+
+        right[left[column]] = column
+        left[right[column]] = column
+
+    def _search(
+        self,
+        stats: Optional[SearchStats] = None,
+        rng: Optional[Random] = None,
+        depth: int = -1,
+        heuristic: Heuristic = "mrv",
+    ) -> Generator[tuple[array, int], None, None]:
+        """
+        Iterative search algorithm to find exact cover solutions. Same as Matrix._search.
+        Args:
+            stats: record counters to this. None to not record anything.
+            rng: try the rows of each chosen column in a random order from this. None to try them top to bottom.
+            depth: don't go deeper than this many rows and yield every partial solution that reaches it.
+                -1 to search the whole tree.
+            heuristic: how to choose the column to branch on. See Heuristic.
+        Yields:
+            (stack, level) for each solution. stack[:level] are ids of a node in each row consisting the solution.
+            stack is reused so it is only valid until the generator is resumed.
+        """
+        # PERF: every read from an array.array boxes a new int which makes the search about twice as slow
+        # as with lists. So the search works on list copies, which also leaves the matrix itself untouched.
+        left, right = self.left.tolist(), self.right.tolist()
+        up, down = self.up.tolist(), self.down.tolist()
+        node_column, size = self.column.tolist(), self.size.tolist()
+
+        # Same as _cover and _uncover but acting on the list copies
+        def cover(column: int) -> None:
+            right[left[column]] = right[column]
+            left[right[column]] = left[column]
+            i = down[column]
+            while i != column:
+                j = right[i]
+                while j != i:
+                    down[up[j]] = down[j]
+                    up[down[j]] = up[j]
+                    size[node_column[j]] -= 1
+                    j = right[j]
+                i = down[i]
+
+        def uncover(column: int) -> None:
+            i = up[column]
+            while i != column:
+                j = left[i]
+                while j != i:
+                    size[node_column[j]] += 1
+                    down[up[j]] = j
+                    up[down[j]] = j
+                    j = left[j]
+                i = up[i]
+            right[left[column]] = column
+            left[right[column]] = column
+
+        # Chooses the column to branch on. None to use the inline MRV scan below.
+        # PERF: MRV is inlined as it is the default and a function call per choice adds up
+        choose: Optional[Callable[[], int]] = None
+        if heuristic == "bucket":
+            cover, uncover, choose = self._buckets(left, right, up, down, size)
+        elif heuristic == "first":
+            choose = partial(right.__getitem__, 0)
+        elif callable(heuristic):
+            choose = partial(heuristic, right, size)
+        elif heuristic != "mrv":
+            raise ValueError("Invalid heuristic")
+
+        # PERF: counting is only done by wrappers so searches without stats don't pay for it
+        if stats is not None:
+            cover, uncover = self._counting(stats, cover, uncover, up, down)
+        start = perf_counter()
+
+        # Every level covers at least one column so the search can't go deeper than the number of columns
+        stack = array("i", [0]) * len(self.labels)
+        level = 0
+
+        # Only used with rng. Same as in Matrix._search
+        orders: list[list[int]] = [[]] * len(stack)
+        positions = [0] * len(stack)
+
+        while True:
+            # row is the row to try next at the current level. -1 if there is nothing to try.
+            if right[0] == 0 or level == depth:
+                # All columns are covered so there is a solution (or a partial one if stopping at depth).
+                if stats is not None:
+                    stats.record_solution(start)
+                yield stack, level
+                row = -1
+            else:
+                if choose is None:
+                    # Pick the first column with the fewest nodes
+                    smallest = right[0]
+                    smallest_size = size[smallest]
+                    column = right[smallest]
+                    while column != 0:
+                        if size[column] < smallest_size:
+                            smallest = column
+                            smallest_size = size[column]
+                        column = right[column]
+                else:
+                    smallest = choose()
+                    smallest_size = size[smallest]
+
+                if stats is not None:
+                    stats.record_choice(level, smallest_size)
+                cover(smallest)
+                if rng is None:
+                    row = down[smallest]
+                else:
+                    order = []
+                    i = down[smallest]
+                    while i != smallest:
+                        order.append(i)
+                        i = down[i]
+                    rng.shuffle(order)
+                    order.append(smallest)
+                    orders[level] = order
+                    positions[level] = 0
+                    row = order[0]
+
+            # Reaching the header means every row in the column has been tried so backtrack
+            while row == -1 or row == node_column[row]:
+                if row != -1:
+                    uncover(row)
+
+                if level == 0:
+                    return
+                level -= 1
+
+                # Uncover all nodes that were covered when the row at this level was chosen.
+                chosen = stack[level]
+                j = left[chosen]
+                while j != chosen:
+                    uncover(node_column[j])
+                    j = left[j]
+
+                # Try the next row in the column
+                if rng is None:
+                    row = down[chosen]
+                else:
+                    positions[level] += 1
+                    row = orders[level][positions[level]]
+
+            # Cover every other column the row has nodes in
+            j = right[row]
+            while j != row:
+                cover(node_column[j])
+                j = right[j]
+
+            # Go down a level, extending the partial solution with row.
+            stack[level] = row
+            level += 1
+            if stats is not None:
+                stats.record_depth(level)
+
+    def _buckets(
+        self,
+        left: list[int],
+        right: list[int],
+        up: list[int],
+        down: list[int],
+        size: list[int],
+    ) -> tuple[Callable[[int], None], Callable[[int], None], Callable[[], int]]:
+        """
+        Keep uncovered primary columns in doubly linked lists by size so the smallest is found
+        without scanning every column.
+        Args:
+            left, right, up, down, size: the links the search acts on
+        Returns:
+            (cover, uncover, choose) acting on the links and keeping the buckets up to date.
+            choose returns the first column in the smallest non-empty bucket.
+        """
+        node_column = self.column.tolist()
+        num_columns = len(self.labels)
+
+        # Ids up to num_columns are headers and num_columns + 1 + s is the head of bucket s
+        heads = num_columns + 1
+        primary = [False] * heads
+        bucket_next = list(range(heads + max(size) + 1))
+        bucket_prev = bucket_next.copy()
+
+        def insert(column: int) -> None:
+            head = heads + size[column]
+            bucket_next[column] = bucket_next[head]
+            bucket_prev[column] = head
+            bucket_prev[bucket_next[head]] = column
+            bucket_next[head] = column
+
+        def remove(column: int) -> None:
+            bucket_next[bucket_prev[column]] = bucket_next[column]
+            bucket_prev[bucket_next[column]] = bucket_prev[column]
+
+        # Columns covered by select() never change size so are left out, as are secondary columns
+        column = left[0]
+        while column != 0:
+            primary[column] = True
+            insert(column)
+            column = left[column]
+
+        # Same as the cover and uncover in _search but also moving each column that changes size
+        # to its new bucket. Rows left in uncovered columns never have nodes in covered ones so
+        # every primary column changing size is in a bucket.
+        def cover(column: int) -> None:
+            if primary[column]:
+                remove(column)
+            right[left[column]] = right[column]
+            left[right[column]] = left[column]
+            i = down[column]
+            while i != column:
+                j = right[i]
+                while j != i:
+                    down[up[j]] = down[j]
+                    up[down[j]] = up[j]
+                    other = node_column[j]
+                    size[other] -= 1
+                    if primary[other]:
+                        remove(other)
+                        insert(other)
+                    j = right[j]
+                i = down[i]
+
+        def uncover(column: int) -> None:
+            i = up[column]
+            while i != column:
+                j = left[i]
+                while j != i:
+                    other = node_column[j]
+                    size[other] += 1
+                    if primary[other]:
+                        remove(other)
+                        insert(other)
+                    down[up[j]] = j
+                    up[down[j]] = j
+                    j = left[j]
+                i = up[i]
+            right[left[column]] = column
+            left[right[column]] = column
+            if primary[column]:
+                insert(column)
+
+        def choose() -> int:
+            head = heads
+            while bucket_next[head] == head:
+                head += 1
+            return bucket_next[head]
+
+        return cover, uncover, choose
+
+    def _counting(
+        self,
+        stats: SearchStats,
+        cover: Callable[[int], None],
+        uncover: Callable[[int], None],
+        up: list[int],
+        down: list[int],
+    ) -> tuple[Callable[[int], None], Callable[[int], None]]:
+        """
+        Args:
+            stats: where to record counters
+            cover, uncover: the functions to wrap
+            up, down: the links cover and uncover act on
+        Returns:
+            cover and uncover wrapped to record to stats
+        """
+        # Every other node in the row of each node. That is how many nodes covering its column unlinks.
+        row_lengths = np.diff(np.frombuffer(self.row_start, dtype=np.intc))
+        others = np.zeros(len(self.left), dtype=np.intc)
+        others[self.row_start[0] : self.row_start[-1]] = np.repeat(
+            row_lengths - 1, row_lengths
+        )
+        node_others = others.tolist()
+
+        def counted_cover(column: int) -> None:
+            stats.covers += 1
+            i = down[column]
+            while i != column:
+                stats.updates += node_others[i]
+                i = down[i]
+            cover(column)
+
+        def counted_uncover(column: int) -> None:
+            stats.uncovers += 1
+            i = up[column]
+            while i != column:
+                stats.updates += node_others[i]
+                i = up[i]
+            uncover(column)
+
+        return counted_cover, counted_uncover
+
+    def _get_row_labels(self, node: int) -> list[int]:
+        """
+        Args:
+            node: id of a node in the row to get labels from
+        Returns:
+            List of all column labels in the row, starting with the one node is in
+        """
+        right, node_column, labels = self.right, self.column, self.labels
+
+        row_labels = [labels[node_column[node]]]
+        j = right[node]
+        while j != node:
+            row_labels.append(labels[node_column[j]])
+            j = right[j]
+
+        return row_labels  # type: ignore[return-value]
+
+    def generate_solutions(
+        self,
+        stats: Optional[SearchStats] = None,
+        rng: Optional[Random] = None,
+        heuristic: Heuristic = "mrv",
+    ) -> Generator[list[list[int]], None, None]:
+        """Wrapper for the search method
+
+        Args:
+            stats: record counters to this. None to not record anything.
+            rng: find solutions in a random order from this. None for the same order every time.
+            heuristic: how to choose the column to branch on. See Heuristic.
+        Yields:
+            All possible exact cover matrices.
+            Gives each row as an array of their column labels in the same order as Matrix.
+        """
+        for stack, level in self._search(stats, rng, heuristic=heuristic):
+            yield [self._get_row_labels(stack[i]) for i in range(level)]
+
+    def generate_solution_rows(
+        self,
+        stats: Optional[SearchStats] = None,
+        rng: Optional[Random] = None,
+        heuristic: Heuristic = "mrv",
+    ) -> Generator[list[int], None, None]:
+        """
+        Cheaper alternative to generate_solutions when the rows are known by their position.
+        Args:
+            stats: record counters to this. None to not record anything.
+            rng: find solutions in a random order from this. None for the same order every time.
+            heuristic: how to choose the column to branch on. See Heuristic.
+        Yields:
+            Index (in the rows given) of every row in each solution.
+            Rows covered with select() are not included.
+        """
+        node_row = self.row
+        for stack, level in self._search(stats, rng, heuristic=heuristic):
+            yield [node_row[stack[i]] for i in range(level)]
+
+    def count_solutions(
+        self,
+        limit: Optional[int] = 2,
+        stats: Optional[SearchStats] = None,
+        heuristic: Heuristic = "mrv",
+    ) -> int:
+        """
+        Count solutions without building them.
+        Args:
+            limit: stop searching once this many solutions are found. None to count all of them.
+            stats: record counters to this. None to not record anything.
+            heuristic: how to choose the column to branch on. See Heuristic.
+        Returns:
+            Number of solutions found (at most limit)
+        """
+        return _count(self._search(stats, heuristic=heuristic), limit)
+
+    def split(self, depth: int) -> list[list[int]]:
+        """
+        Split the search into subproblems that can be searched independently, in the order
+        the search would reach them.
+        Args:
+            depth: number of levels of the search to expand
+        Returns:
+            Rows (as in generate_solution_rows) to select() for each subproblem.
+            Every solution is found in exactly one subproblem.
+            Solutions shallower than depth are their own subproblem with nothing left to search.
+        """
+        if depth < 0:
+            raise ValueError("depth can't be negative")
+
+        node_row = self.row
+        return [
+            [node_row[stack[i]] for i in range(level)]
+            for stack, level in self._search(depth=depth)
+        ]
+
+    def search(self) -> Search:
+        """
+        Returns:
+            Search of this matrix that can be paused and resumed. See Search.
+        """
+        return Search(self)
+
+
+class Search:
+    """
+    Search of an ArrayMatrix that runs for a budget and can be continued later, e.g. from a GUI
+    event loop without blocking it. Same algorithm and order of solutions as ArrayMatrix._search.
+
+    The search only ever stops before choosing a column so its whole state is the links,
+    the rows chosen so far and the level. See get_state and from_state.
+
+    Attributes:
+        matrix: matrix being searched. Never modified, the search works on its own copy of the links.
+        updates: number of node updates (nodes unlinked or relinked) done so far
+        finished: True once every solution has been found
+    """
+
+    __slots__ = (
+        "matrix",
+        "updates",
+        "finished",
+        "_left",
+        "_right",
+        "_up",
+        "_down",
+        "_size",
+        "_stack",
+        "_level",
+    )
+
+    def __init__(self, matrix: ArrayMatrix) -> None:
+        self.matrix = matrix
+        self.updates = 0
+        self.finished = False
+
+        self._left = matrix.left.tolist()
+        self._right = matrix.right.tolist()
+        self._up = matrix.up.tolist()
+        self._down = matrix.down.tolist()
+        self._size = matrix.size.tolist()
+        # Every level covers at least one column so the search can't go deeper than the number of columns
+        self._stack = [0] * len(matrix.labels)
+        self._level = 0
+
+    def get_state(self) -> dict:
+        """
+        Returns:
+            Everything needed to continue the search. Only contains lists and ints so can be saved with json.
+        """
+        return {
+            "left": self._left.copy(),
+            "right": self._right.copy(),
+            "up": self._up.copy(),
+            "down": self._down.copy(),
+            "size": self._size.copy(),
+            "stack": self._stack[: self._level],
+            "updates": self.updates,
+            "finished": self.finished,
+        }
+
+    @classmethod
+    def from_state(cls, matrix: ArrayMatrix, state: dict) -> Search:
+        """
+        Args:
+            matrix: the matrix that was being searched when state was made
+            state: from get_state
+        Raises:
+            ValueError: state doesn't belong to a matrix the same size as matrix
+        """
+        search = cls(matrix)
+        for name in ("left", "right", "up", "down", "size"):
+            links = list(state[name])
+            if len(links) != len(getattr(search, f"_{name}")):
+                raise ValueError("State does not match matrix")
+            setattr(search, f"_{name}", links)
+
+        if len(state["stack"]) > len(search._stack):
+            raise ValueError("State does not match matrix")
+        search._level = len(state["stack"])
+        search._stack[: search._level] = state["stack"]
+        search.updates = state["updates"]
+        search.finished = state["finished"]
+        return search
+
+    def run(
+        self,
+        max_updates: Optional[int] = None,
+        max_ms: Optional[float] = None,
+        max_solutions: Optional[int] = None,
+    ) -> list[list[int]]:
+        """
+        Continue the search until a budget runs out or it finishes.
+        At least one step is always taken so repeatedly calling run always makes progress.
+        Args:
+            max_updates: stop after about this many more node updates. None for no limit.
+            max_ms: stop after about this many milliseconds. None for no limit.
+            max_solutions: stop once this many solutions have been found in this call. None for no limit.
+        Returns:
+            Solutions found in this call in the same format as ArrayMatrix.generate_solution_rows.
+            Check finished to tell if there are any more.
+        """
+        solutions: list[list[int]] = []
+        if self.finished:
+            return solutions
+
+        left, right, up, down, size = (
+            self._left,
+            self._right,
+            self._up,
+            self._down,
+            self._size,
+        )
+        node_column, node_row = self.matrix.column, self.matrix.row
+        stack = self._stack
+        level = self._level
+        updates = self.updates
+
+        stop_updates = None if max_updates is None else updates + max_updates
+        deadline = None if max_ms is None else perf_counter() + max_ms / 1000
+
+        # Same as ArrayMatrix._search but counting updates
+        def cover(column: int) -> int:
+            count = 0
+            right[left[column]] = right[column]
+            left[right[column]] = left[column]
+            i = down[column]
+            while i != column:
+                j = right[i]
+                while j != i:
+                    down[up[j]] = down[j]
+                    up[down[j]] = up[j]
+                    size[node_column[j]] -= 1
+                    count += 1
+                    j = right[j]
+                i = down[i]
+            return count
+
+        def uncover(column: int) -> int:
+            count = 0
+            i = up[column]
+            while i != column:
+                j = left[i]
+                while j != i:
+                    size[node_column[j]] += 1
+                    down[up[j]] = j
+                    up[down[j]] = j
+                    count += 1
+                    j = left[j]
+                i = up[i]
+            right[left[column]] = column
+            left[right[column]] = column
+            return count
+
+        try:
+            while True:
+                # row is the row to try next at the current level. -1 if there is nothing to try.
+                if right[0] == 0:
+                    solutions.append([node_row[stack[i]] for i in range(level)])
+                    row = -1
+                else:
+                    smallest = right[0]
+                    smallest_size = size[smallest]
+                    column = right[smallest]
+                    while column != 0:
+                        if size[column] < smallest_size:
+                            smallest = column
+                            smallest_size = size[column]
+                        column = right[column]
+
+                    updates += cover(smallest)
+                    row = down[smallest]
+
+                while row == -1 or row == node_column[row]:
+                    if row != -1:
+                        updates += uncover(row)
+
+                    if level == 0:
+                        self.finished = True
+                        return solutions
+                    level -= 1
+
+                    chosen = stack[level]
+                    j = left[chosen]
+                    while j != chosen:
+                        updates += uncover(node_column[j])
+                        j = left[j]
+
+                    row = down[chosen]
+
+                j = right[row]
+                while j != row:
+                    updates += cover(node_column[j])
+                    j = right[j]
+
+                stack[level] = row
+                level += 1
+
+                # Only stop here so the state is always "about to choose a column at level"
+                if (
+                    (stop_updates is not None and updates >= stop_updates)
+                    or (deadline is not None and perf_counter() >= deadline)
+                    or (max_solutions is not None and len(solutions) >= max_solutions)
+                ):
+                    return solutions
+        finally:
+            self._level = level
+            self.updates = updates
+
+
+# Matrix being searched in a worker process. Set once per process by _init_worker so it isn't sent with every task.
+_worker_matrix: Optional[ArrayMatrix] = None
+
+
+def _init_worker(matrix: ArrayMatrix) -> None:
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _subproblem(matrix: ArrayMatrix, rows: list[int]) -> ArrayMatrix:
+    """
+    Returns:
+        Copy of matrix with rows selected
+    """
+    subproblem = matrix.copy()
+    for row in rows:
+        if not subproblem.select(row):
+            raise ValueError("Rows share a column")
+    return subproblem
+
+
+def _count_subproblem(rows: list[int], limit: Optional[int]) -> int:
+    """
+    Runs in worker processes
+    """
+    assert _worker_matrix is not None
+    return _subproblem(_worker_matrix, rows).count_solutions(limit)
+
+
+def _solve_subproblem(rows: list[int]) -> list[list[int]]:
+    """
+    Runs in worker processes
+    """
+    assert _worker_matrix is not None
+    return [
+        rows + solution
+        for solution in _subproblem(_worker_matrix, rows).generate_solution_rows()
+    ]
+
+
+def parallel_count_solutions(
+    matrix: ArrayMatrix,
+    depth: int = 2,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Count solutions using several processes. Only worth it for problems with a huge search tree.
+    Args:
+        matrix: matrix to search. Not modified.
+        depth: levels of the search to expand into subproblems (see ArrayMatrix.split).
+            Deeper gives more, smaller subproblems which balance better between processes.
+        workers: number of processes. None for one per CPU, 1 to count in this process.
+        limit: stop once this many solutions are found. None to count all of them.
+    Returns:
+        Number of solutions found (at most limit)
+    """
+    if limit is not None and limit <= 0:
+        return 0
+
+    subproblems = matrix.split(depth)
+
+    if workers == 1:
+        count = 0
+        for rows in subproblems:
+            count += _subproblem(matrix, rows).count_solutions(
+                None if limit is None else limit - count
+            )
+            if count == limit:
+                break
+        return count
+
+    count = 0
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(matrix,)
+    )
+    try:
+        futures = [
+            executor.submit(_count_subproblem, rows, limit) for rows in subproblems
+        ]
+        for future in as_completed(futures):
+            count += future.result()
+            if limit is not None and count >= limit:
+                return limit
+    finally:
+        # Don't search anything else if the limit was reached
+        executor.shutdown(cancel_futures=True)
+    return count
+
+
+def parallel_solution_rows(
+    matrix: ArrayMatrix, depth: int = 2, workers: Optional[int] = None
+) -> Generator[list[int], None, None]:
+    """
+    Same as matrix.generate_solution_rows() (including the order) but using several processes.
+    Each subproblem's solutions are built in a worker before being yielded so this uses more memory.
+    Args:
+        matrix: matrix to search. Not modified.
+        depth: levels of the search to expand into subproblems (see ArrayMatrix.split)
+        workers: number of processes. None for one per CPU, 1 to search in this process.
+    Yields:
+        Index (in the rows given) of every row in each solution
+    """
+    subproblems = matrix.split(depth)
+
+    if workers == 1:
+        for rows in subproblems:
+            for solution in _subproblem(matrix, rows).generate_solution_rows():
+                yield rows + solution
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(matrix,)
+    )
+    try:
+        for solutions in executor.map(_solve_subproblem, subproblems):
+            yield from solutions
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _count(search: Generator, limit: Optional[int]) -> int:
+    """
+    Args:
+        search: a _search() generator
+        limit: stop once this many solutions are found. None for no limit.
+    Returns:
+        Number of solutions search yielded (at most limit)
+    """
+    if limit is not None and limit <= 0:
+        return 0
+
+    count = 0
+    for _ in search:
+        count += 1
+        if count == limit:
+            # Closing the generator stops the search without finishing it
+            search.close()
+            break
+    return count
+
+
+def _to_array(arr: npt.NDArray[np.intc]) -> array:
+    """
+    Args:
+        arr: 1d numpy array with dtype np.intc
+    Returns:
+        Copy of arr as array.array with typecode "i"
+    """
+    # np.intc is C's int so the buffer can be copied directly
+    out = array("i")
+    out.frombytes(arr.astype(np.intc, copy=False).tobytes())
+    return out
@@ -2,9 +2,26 @@ import argparse
 import sys
 
 
+def _positive_int(value: str) -> int:
+    """
+    argparse type for options that must be at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
 def main():
     save_manager_names = ["save_manager", "sm"]
-    if sys.argv[1:] and sys.argv[1] in (save_manager_names + ["-h", "--help"]):
+    solve_names = ["solve"]
+    generate_names = ["generate"]
+    if sys.argv[1:] and sys.argv[1] in (
+        save_manager_names + solve_names + generate_names + ["-h", "--help"]
+    ):
         parser = argparse.ArgumentParser(prog="super_sudoku_solver")
 
         # If subparser used set entry_point to subparser's name. Otherwise leave as None.
@@ -67,11 +84,122 @@ def main():
             help="Restore default config file.",
         )
 
+        # Use this subparser when first arg is in `solve_names`
+        solve_parser = subparsers.add_parser(
+            name=solve_names[0],
+            description="Solve puzzles given one per line in the same format as save_manager --add CLUES.",
+            aliases=solve_names[1:],
+        )
+        solve_parser.add_argument(
+            "file",
+            nargs="?",
+            type=argparse.FileType("r", encoding="utf-8"),
+            default="-",
+            metavar="FILE",
+            help="File to read puzzles from. Reads from stdin if not given or -.",
+        )
+        solve_parser.add_argument(
+            "-j",
+            "--jobs",
+            type=_positive_int,
+            default=None,
+            metavar="N",
+            help="Number of processes to solve with. Defaults to one per CPU.",
+        )
+        solve_parser.add_argument(
+            "-e",
+            "--engine",
+            choices=["bitboard", "dlx"],
+            default="bitboard",
+            help="Solver to use.",
+        )
+        solve_parser.add_argument(
+            "--unordered",
+            action="store_true",
+            help="Print results as soon as they are solved instead of in input order.",
+        )
+        solve_parser.add_argument(
+            "--chunksize",
+            type=_positive_int,
+            default=256,
+            metavar="N",
+            help="Number of puzzles sent to a process at a time.",
+        )
+        solve_parser.add_argument(
+            "--no-propagate",
+            action="store_true",
+            help="Don't fill singles on each chunk with numpy before searching.",
+        )
+
+        # Use this subparser when first arg is in `generate_names`
+        generate_parser = subparsers.add_parser(
+            name=generate_names[0],
+            description="Print new puzzles with unique solutions, "
+            "one per line in the same format as save_manager --add CLUES.",
+            aliases=generate_names[1:],
+        )
+        generate_parser.add_argument(
+            "count",
+            nargs="?",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Number of puzzles to generate.",
+        )
+        generate_parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Seed to get the same puzzles every time.",
+        )
+        generate_parser.add_argument(
+            "--symmetric",
+            action="store_true",
+            help="Only make puzzles with 180 degree rotational symmetry.",
+        )
+        generate_parser.add_argument(
+            "--size",
+            type=int,
+            choices=[9, 16, 25],
+            default=9,
+            help="Number of rows in the board.",
+        )
+        generate_parser.add_argument(
+            "--min-clues",
+            type=int,
+            default=17,
+            metavar="N",
+            help="Never make puzzles with fewer than N clues.",
+        )
+        generate_parser.add_argument(
+            "--max-nodes",
+            type=_positive_int,
+            default=1000,
+            metavar="N",
+            help="Keep a clue if checking the puzzle is still unique without it takes more than N search nodes. "
+            "Large boards can take minutes per check without this.",
+        )
+        generate_parser.add_argument(
+            "--solutions",
+            action="store_true",
+            help="Print each solution after its puzzle.",
+        )
+
         args = parser.parse_args()
 
-        import super_sudoku_solver.save_manager as save_manager
+        if args.entry_point in solve_names:
+            # Doesn't import save_manager so can run alongside the app
+            import super_sudoku_solver.batch as batch
+
+            batch.main(args)
+        elif args.entry_point in generate_names:
+            import super_sudoku_solver.generator as generator
+
+            generator.main(args)
+        else:
+            import super_sudoku_solver.save_manager as save_manager
 
-        save_manager.main(args)
+            save_manager.main(args)
     else:
         import super_sudoku_solver.gui as gui
 
@@ -0,0 +1,126 @@
+"""
+Generate new puzzles.
+
+A complete grid is found with a randomized dlx search of an empty board.
+Clues are then removed from it one at a time in a random order, keeping each removal only if
+the puzzle still has exactly one solution. So every puzzle made has a unique solution and no clue
+can be removed from it without losing that, unless checking took longer than the node budget.
+
+Like batch this never imports save_manager.
+"""
+
+from random import Random
+from typing import Optional
+import sys
+
+import numpy as np
+
+import super_sudoku_solver.bitboard_solver as bitboard
+import super_sudoku_solver.sudoku_matrix as sudoku_matrix
+
+from super_sudoku_solver.custom_types import Cells
+from super_sudoku_solver.sizes import box_size, format_cells
+
+# Search nodes a uniqueness check may take before the clue is kept anyway.
+# Checks on 9x9 boards never get close. Some on 25x25 boards can take minutes without it.
+MAX_NODES = 1000
+
+
+def random_grid(rng: Random, size: int = 9) -> Cells:
+    """
+    Args:
+        rng: source of randomness. The same state always gives the same grid.
+        size: board size
+    Returns:
+        nxn array of a random complete grid
+    """
+    box_size(size)  # Raises ValueError if size isn't supported
+    empty = np.full((size, size), -1, dtype=np.int8)
+    # An empty board has a huge number of solutions so the first one is found almost immediately
+    rows = next(sudoku_matrix.template(size).copy().generate_solution_rows(rng=rng))
+    return sudoku_matrix.extract(empty, rows)
+
+
+def remove_clues(
+    grid: Cells,
+    rng: Random,
+    symmetric: bool = False,
+    min_clues: int = 17,
+    max_nodes: Optional[int] = MAX_NODES,
+) -> Cells:
+    """
+    Args:
+        grid: nxn array of a complete grid or a puzzle with a unique solution
+        rng: decides the order cells are tried in
+        symmetric: remove cells in pairs so clues have 180 degree rotational symmetry
+        min_clues: never go below this many clues
+        max_nodes: keep a clue if checking its removal takes more search nodes than this.
+            None to always finish the check.
+    Returns:
+        Copy of grid with as many clues removed as possible while keeping one solution
+    """
+    puzzle = np.array(grid, dtype=np.int8, copy=True)
+    last = puzzle.size - 1
+
+    cells = list(range(puzzle.size))
+    rng.shuffle(cells)
+
+    for cell in cells:
+        # Cells are removed with their pair so may already be empty
+        if puzzle.flat[cell] == -1:
+            continue
+
+        removed = {cell, last - cell} if symmetric else {cell}
+        if np.count_nonzero(puzzle != -1) - len(removed) < min_clues:
+            continue
+
+        old = [(other, puzzle.flat[other]) for other in removed]
+        for other in removed:
+            puzzle.flat[other] = -1
+
+        # None if it ran out of nodes, which keeps the clue as uniqueness wasn't proven
+        if bitboard.count_solutions(puzzle, limit=2, max_nodes=max_nodes) != 1:
+            for other, value in old:
+                puzzle.flat[other] = value
+
+    return puzzle
+
+
+def generate(
+    seed: Optional[int] = None,
+    symmetric: bool = False,
+    min_clues: int = 17,
+    size: int = 9,
+    max_nodes: Optional[int] = MAX_NODES,
+) -> tuple[Cells, Cells]:
+    """
+    Args:
+        seed: same seed gives the same puzzle. None for a different one every time.
+        symmetric: clues have 180 degree rotational symmetry
+        min_clues: never have fewer clues than this
+        size: board size
+        max_nodes: search nodes each uniqueness check may take, see remove_clues
+    Returns:
+        (puzzle, solution) as nxn arrays. -1 for empty cells in puzzle.
+    """
+    rng = Random(seed)
+    solution = random_grid(rng, size)
+    return remove_clues(solution, rng, symmetric, min_clues, max_nodes), solution
+
+
+def main(args) -> None:
+    """
+    Print args.count new puzzles, one per line in the same format as save_manager --add CLUES.
+    """
+    # One Random for every puzzle so a seed gives a reproducible sequence without repeats
+    rng = Random(args.seed)
+    for _ in range(args.count):
+        solution = random_grid(rng, args.size)
+        puzzle = remove_clues(
+            solution, rng, args.symmetric, args.min_clues, args.max_nodes
+        )
+        if args.solutions:
+            print(format_cells(puzzle), format_cells(solution))
+        else:
+            print(format_cells(puzzle))
+        sys.stdout.flush()
@@ -407,7 +407,12 @@ class PuzzleSelector(QListWidget):
         super().__init__()
         self.settings = settings
 
-        self._puzzles = Puzzles().puzzle_map
+        # The board is only drawn at the standard size
+        self._puzzles = {
+            name: puzzle
+            for name, puzzle in Puzzles().puzzle_map.items()
+            if puzzle.size == 9
+        }
         puzzle_names = list(self._puzzles.keys())
         self.addItems(puzzle_names)
 
@@ -644,7 +649,7 @@ class MainScene(QGraphicsScene):
     @_auto_note
     def set_puzzle(self, puzzle: Puzzle):
         self.puzzle = puzzle
-        self.data = Board(puzzle)
+        self.data = Board(puzzle, engine=self.settings.solver.engine)
 
         self.selected_cell = None
         # self.cells: list[list[Cell]] = []
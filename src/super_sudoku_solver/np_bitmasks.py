@@ -0,0 +1,137 @@
+"""
+Candidates packed into one int per cell.
+
+Bit v of a cell's mask is set if v is a candidate, the same as the masks in bitboard_solver.
+So (n,n,n) Candidates with indexes [value, row, column] become (n,n) masks with indexes [row, column],
+162 bytes instead of 729 for a standard board.
+Every function also accepts extra leading axes to work on many boards at once.
+"""
+
+import numpy as np
+import numpy.typing as npt
+import super_sudoku_solver.np_candidates as npc
+
+from super_sudoku_solver.custom_types import Candidates
+from super_sudoku_solver.sizes import box_size
+
+# Lookup tables are for every 16 bit int. Masks of 25x25 boards are looked up in two halves.
+_TABLE_BITS = 16
+_TABLE_MASK = (1 << _TABLE_BITS) - 1
+
+_table_values = np.arange(1 << _TABLE_BITS, dtype=np.uint32)
+
+# Number of set bits in each 16 bit int
+POPCOUNT = np.bitwise_count(_table_values).astype(np.uint8)
+
+# Index of the lowest set bit in each 16 bit int. -1 for 0.
+LOWEST_BIT = np.full(1 << _TABLE_BITS, -1, dtype=np.int8)
+LOWEST_BIT[1:] = np.log2(_table_values[1:] & -_table_values[1:]).astype(np.int8)
+
+POPCOUNT.flags.writeable = False
+LOWEST_BIT.flags.writeable = False
+del _table_values
+
+
+def mask_dtype(size: int) -> type[np.unsignedinteger]:
+    """
+    Returns:
+        Smallest unsigned int dtype with a bit for every value of a board of size
+    """
+    box_size(size)  # Raises ValueError if size isn't supported
+    return np.uint16 if size <= 16 else np.uint32
+
+
+def pack(candidates: Candidates) -> npt.NDArray[np.unsignedinteger]:
+    """
+    Args:
+        candidates: (..., n, n, n) with indexes [..., value, row, column]
+    Returns:
+        (..., n, n) masks of mask_dtype(n)
+    """
+    size = candidates.shape[-3]
+    dtype = mask_dtype(size)
+    bits = np.left_shift(1, np.arange(size, dtype=dtype), dtype=dtype)
+    return np.sum(candidates * bits[:, np.newaxis, np.newaxis], axis=-3, dtype=dtype)
+
+
+def unpack(masks: npt.NDArray[np.unsignedinteger]) -> Candidates:
+    """
+    Inverse of pack
+    Args:
+        masks: (..., n, n)
+    Returns:
+        (..., n, n, n) np.bool candidates with indexes [..., value, row, column]
+    """
+    size = masks.shape[-1]
+    shifts = np.arange(size, dtype=masks.dtype)[:, np.newaxis, np.newaxis]
+    return ((masks[..., np.newaxis, :, :] >> shifts) & 1).astype(np.bool)
+
+
+def popcount(masks: npt.NDArray[np.unsignedinteger]) -> npt.NDArray[np.uint8]:
+    """
+    Returns:
+        Number of candidates in each mask
+    """
+    counts = POPCOUNT[masks & _TABLE_MASK]
+    if masks.dtype.itemsize * 8 > _TABLE_BITS:
+        counts += POPCOUNT[masks >> _TABLE_BITS]
+    return counts
+
+
+def lowest_bit(masks: npt.NDArray[np.unsignedinteger]) -> npt.NDArray[np.int8]:
+    """
+    Returns:
+        Lowest candidate in each mask. -1 for masks with no candidates.
+    """
+    lowest = LOWEST_BIT[masks & _TABLE_MASK]
+    if masks.dtype.itemsize * 8 > _TABLE_BITS:
+        high = LOWEST_BIT[masks >> _TABLE_BITS]
+        lowest = np.where(
+            lowest != -1, lowest, np.where(high != -1, high + _TABLE_BITS, -1)
+        ).astype(np.int8)
+    return lowest
+
+
+def houses(masks: npt.NDArray[np.unsignedinteger]) -> npt.NDArray[np.unsignedinteger]:
+    """
+    Args:
+        masks: (..., n, n)
+    Returns:
+        (..., 3n, n) masks of the cells in each house.
+        Houses and cells are as in np_candidates.house_cells().
+    """
+    size = masks.shape[-1]
+    flat = masks.reshape((*masks.shape[:-2], size * size))
+    return flat[..., npc.house_cells(size)]
+
+
+def house_union(
+    masks: npt.NDArray[np.unsignedinteger],
+) -> npt.NDArray[np.unsignedinteger]:
+    """
+    Args:
+        masks: (..., n, n)
+    Returns:
+        (..., 3n) values that are a candidate somewhere in each house. Houses are ordered as in houses().
+    """
+    return np.bitwise_or.reduce(houses(masks), axis=-1)
+
+
+def house_unique(
+    masks: npt.NDArray[np.unsignedinteger],
+) -> npt.NDArray[np.unsignedinteger]:
+    """
+    Args:
+        masks: (..., n, n)
+    Returns:
+        (..., 3n) values that are a candidate in exactly one cell of each house (hidden singles).
+        Houses are ordered as in houses().
+    """
+    by_house = houses(masks)
+    once = np.zeros(by_house.shape[:-1], dtype=masks.dtype)  # values in at least one cell
+    twice = np.zeros_like(once)  # values in at least two cells
+    # PERF: a loop over the n cells of a house, each step working on every house at once
+    for cell in np.moveaxis(by_house, -1, 0):
+        twice |= once & cell
+        once |= cell
+    return once & ~twice
@@ -1,8 +1,14 @@
-"""Numpy functions mostly for interacting with (9,9) np.int8 arrays."""
+"""Numpy functions mostly for interacting with (n,n) np.int8 arrays (n is 9 for a standard board, see sizes)."""
 
 import numpy as np
 import numpy.typing as npt
 
+from functools import cache
+from typing import Literal, NamedTuple
+
+from super_sudoku_solver.custom_types import Adjacency
+from super_sudoku_solver.sizes import box_size
+
 
 def normalise_coords(coords):
     coords = coords.astype(np.int8, casting="same_value")
@@ -20,92 +26,222 @@ def normalise_coords(coords):
     return coords
 
 
-def adjacent_row(
-    coords: npt.NDArray[np.integer], to_n: int = 1, strict: bool = False
+class AdjacencyMasks(NamedTuple):
+    """
+    Masks of the cells in the same house as each cell.
+    Each is a read only (n,n,n,n) np.bool array where [row, column] is the nxn mask for the cell at (row, column).
+
+    Attributes:
+        row: cells in the same row
+        column: cells in the same column
+        box: cells in the same box
+        adjacent: cells in the same row, column or box. Same as row | column | box.
+    """
+
+    row: npt.NDArray[np.bool]
+    column: npt.NDArray[np.bool]
+    box: npt.NDArray[np.bool]
+    adjacent: npt.NDArray[np.bool]
+
+
+@cache
+def adjacency_masks(size: int = 9) -> AdjacencyMasks:
+    """
+    Args:
+        size: board size
+    Returns:
+        Masks for every cell of a board of size. Built once per size.
+    """
+    box = box_size(size)
+    rows, columns = np.indices((size, size))
+    boxes = box * (rows // box) + columns // box
+
+    # [row, column, other row, other column]
+    row = rows[:, :, None, None] == rows[None, None]
+    column = columns[:, :, None, None] == columns[None, None]
+    box_mask = boxes[:, :, None, None] == boxes[None, None]
+    masks = AdjacencyMasks(row, column, box_mask, row | column | box_mask)
+
+    for mask in masks:
+        mask.flags.writeable = False
+    return masks
+
+
+# Masks for a standard board
+ADJACENCY_MASKS = adjacency_masks(9)
+
+# Adjacency of each group of n houses in house_cells()
+HOUSE_ADJACENCIES: tuple[Adjacency, ...] = ("row", "column", "box")
+
+
+@cache
+def house_cells(size: int = 9) -> npt.NDArray[np.intp]:
+    """
+    Args:
+        size: board size
+    Returns:
+        Read only (3n,n) array of the cells in each house as row * n + column.
+        Houses 0 to n-1 are rows, n to 2n-1 columns and 2n to 3n-1 boxes (same as bitboard_solver).
+        Cells are in row order. So house // n indexes HOUSE_ADJACENCIES.
+    """
+    box = box_size(size)
+    cells = np.arange(size * size).reshape((size, size))
+    boxes = cells.reshape((box, box, box, box)).swapaxes(1, 2).reshape((size, size))
+    houses = np.concatenate((cells, cells.T, boxes))
+    houses.flags.writeable = False
+    return houses
+
+
+# Houses of a standard board
+HOUSE_CELLS = house_cells(9)
+
+
+def house_coords(size: int = 9) -> npt.NDArray[np.intp]:
+    """
+    Returns:
+        (3n,n,2) [row, column] of each cell in house_cells()
+    """
+    return np.stack(np.divmod(house_cells(size), size), axis=-1)
+
+
+def by_house(candidates: npt.NDArray[np.bool]) -> npt.NDArray[np.bool]:
+    """
+    Gather candidates by house in one step.
+    Args:
+        candidates: (..., n, n, n) with indexes [..., value, row, column]
+    Returns:
+        (..., 3n, n, n) copy with indexes [..., house, cell in house, value]. Houses and cells are as in house_cells().
+    """
+    size = candidates.shape[-1]
+    flat = candidates.reshape((*candidates.shape[:-2], size * size))
+    return np.moveaxis(flat[..., house_cells(size)], -3, -1)
+
+
+def house_counts(candidates: npt.NDArray[np.bool]) -> npt.NDArray[np.uint8]:
+    """
+    Args:
+        candidates: (..., n, n, n) with indexes [..., value, row, column]
+    Returns:
+        (..., 3n, n) number of cells that can be each value in each house. Indexes [..., house, value].
+    """
+    return np.add.reduce(by_house(candidates), axis=-2, dtype=np.uint8)
+
+
+def _count_mask(
+    counts: npt.NDArray[np.uint8], to_n: int, strict: bool
 ) -> npt.NDArray[np.bool]:
     """
     Args:
-        coords: [[row, column], [row, column]...] (0-based indexing). Column is required but will not change return value so can be set arbitrarily.
-        to_n: how many of the coords given need to be adjacent to. (-1 for adjacent to all)
+        counts: how many coords each cell is adjacent to
+        to_n, strict: as in adjacent_row
+    Returns:
+        Boolean array where True represents cells adjacent to enough coords
+    """
+    if strict:
+        return counts == to_n
+    return counts >= to_n
+
+
+def masks(
+    coords: npt.NDArray[np.integer],
+    adjacency: Adjacency | Literal["adjacent"] = "adjacent",
+    size: int = 9,
+) -> npt.NDArray[np.bool]:
+    """
+    Batched adjacency. No Python loop over coords.
+    Args:
+        coords: (..., 2) array of [row, column] (0-based indexing)
+        adjacency: "row", "column", "box" or "adjacent" for any of them
+        size: board size
+    Returns:
+        (..., n, n) Boolean array with the mask of cells in the same adjacency as each coord
+    """
+    if adjacency not in AdjacencyMasks._fields:
+        raise ValueError("Invalid adjacency")
+    coords = np.asarray(coords)
+    return getattr(adjacency_masks(size), adjacency)[coords[..., 0], coords[..., 1]]
+
+
+def seen_by(
+    coords: npt.NDArray[np.integer],
+    to_n: int = -1,
+    strict: bool = False,
+    adjacency: Adjacency | Literal["adjacent"] = "adjacent",
+    size: int = 9,
+) -> npt.NDArray[np.bool]:
+    """
+    Batched version of adjacent_row, adjacent_column, adjacent_box and adjacent for groups of coords.
+    Args:
+        coords: (..., m, 2) array of groups of m coords
+        to_n: how many of the coords in each group need to be adjacent to. (-1 for adjacent to all)
         strict: True means most be adjacent to exactly to_n coords. False means to_n or more.
+        adjacency: as in masks()
+        size: board size
     Returns:
-        9x9 Boolean array where True represents cells in rows from coords given
+        (..., n, n) Boolean array where True represents cells seen by enough coords of each group
     """
-    coords = normalise_coords(coords)
+    group_masks = masks(coords, adjacency, size)
     if to_n == -1:
-        to_n = coords.shape[0]
+        if not strict:
+            return np.logical_and.reduce(group_masks, axis=-3)
+        to_n = group_masks.shape[-3]
 
-    board = np.full((coords.shape[0], 9, 9), False, dtype=np.bool)
-    for x in range(coords.shape[0]):
-        board[x, coords[x, 0]] = True
+    counts = np.add.reduce(group_masks, axis=-3, dtype=np.uint8)
+    return _count_mask(counts, to_n, strict)
 
-    counts = np.add.reduce(board, axis=0, dtype=np.uint8)
-    if strict:
-        mask = counts == to_n
-    else:
-        mask = counts >= to_n
 
-    return mask
+def adjacent_row(
+    coords: npt.NDArray[np.integer],
+    to_n: int = 1,
+    strict: bool = False,
+    size: int = 9,
+) -> npt.NDArray[np.bool]:
+    """
+    Args:
+        coords: [[row, column], [row, column]...] (0-based indexing). Column is required but will not change return value so can be set arbitrarily.
+        to_n: how many of the coords given need to be adjacent to. (-1 for adjacent to all)
+        strict: True means most be adjacent to exactly to_n coords. False means to_n or more.
+        size: board size
+    Returns:
+        nxn Boolean array where True represents cells in rows from coords given
+    """
+    return seen_by(normalise_coords(coords), to_n, strict, "row", size)
 
 
 def adjacent_column(
-    coords: npt.NDArray[np.integer], to_n: int = 1, strict: bool = False
+    coords: npt.NDArray[np.integer],
+    to_n: int = 1,
+    strict: bool = False,
+    size: int = 9,
 ) -> npt.NDArray[np.bool]:
     """
     Args:
         coords: [[row, column], [row, column]...] (0-based indexing). Row is required but will not change return value so can be set arbitrarily.
         to_n: how many of the coords given need to be adjacent to. (-1 for adjacent to all)
         strict: True means most be adjacent to exactly to_n coords. False means to_n or more.
+        size: board size
     Returns:
-        9x9 Boolean array where True represents cells in columns from coords given
+        nxn Boolean array where True represents cells in columns from coords given
     """
-    coords = normalise_coords(coords)
-    if to_n == -1:
-        to_n = coords.shape[0]
-
-    board = np.full((coords.shape[0], 9, 9), False, dtype=np.bool)
-    for x in range(coords.shape[0]):
-        board[x, :, coords[x, 1]] = True
-
-    counts = np.add.reduce(board, axis=0, dtype=np.uint8)
-    if strict:
-        mask = counts == to_n
-    else:
-        mask = counts >= to_n
-
-    return mask
+    return seen_by(normalise_coords(coords), to_n, strict, "column", size)
 
 
 def adjacent_box(
-    coords: npt.NDArray[np.integer], to_n: int = 1, strict: bool = False
+    coords: npt.NDArray[np.integer],
+    to_n: int = 1,
+    strict: bool = False,
+    size: int = 9,
 ) -> npt.NDArray[np.bool]:
     """
     Args:
         coords: [[row, column], [row, column]...] (0-based indexing).
         to_n: how many of the coords given need to be adjacent to. (-1 for adjacent to all)
         strict: True means most be adjacent to exactly to_n coords. False means to_n or more.
+        size: board size
     Returns:
-        9x9 Boolean array where True represents cells in boxes from coords given
+        nxn Boolean array where True represents cells in boxes from coords given
     """
-    coords = normalise_coords(coords)
-    if to_n == -1:
-        to_n = coords.shape[0]
-
-    board = np.full((coords.shape[0], 9, 9), False, dtype=np.bool)
-    for x in range(coords.shape[0]):
-        board[
-            x,
-            3 * (coords[x, 0] // 3) : 3 * (coords[x, 0] // 3) + 3,
-            3 * (coords[x, 1] // 3) : 3 * (coords[x, 1] // 3) + 3,
-        ] = True
-
-    counts = np.add.reduce(board, axis=0, dtype=np.uint8)
-    if strict:
-        mask = counts == to_n
-    else:
-        mask = counts >= to_n
-
-    return mask
+    return seen_by(normalise_coords(coords), to_n, strict, "box", size)
 
 
 def adjacent(
@@ -113,6 +249,7 @@ def adjacent(
     to_n: int = 1,
     strict: bool = False,
     any_adjacency: bool = True,
+    size: int = 9,
 ) -> npt.NDArray[np.bool]:
     """
     Args:
@@ -120,35 +257,19 @@ def adjacent(
         to_n: how many of the coords given need to be adjacent to. (-1 for adjacent to all)
         strict: True means most be adjacent to exactly to_n coords. False means to_n or more.
         any_adjacency: True is logical or of all adjacency types, False is logical and.
+        size: board size
     Returns:
-        9x9 Boolean array where True represents cells in boxes from coords given
+        nxn Boolean array where True represents cells in boxes from coords given
     """
     coords = normalise_coords(coords)
+    if any_adjacency:
+        return seen_by(coords, to_n, strict, "adjacent", size)
+
     if to_n == -1:
         to_n = coords.shape[0]
-
-    counts = np.full((9, 9), 0, dtype=np.int8)
-    # Coords have to be done one at a time to allow to_n to work as counts are needed not just bool mask
-    for coord in coords:
-        if any_adjacency:
-            counts += np.logical_or.reduce(
-                np.array(
-                    [adjacent_row(coord), adjacent_column(coord), adjacent_box(coord)]
-                )
-            )
-        else:
-            counts += np.logical_and.reduce(
-                np.array(
-                    [adjacent_row(coord), adjacent_column(coord), adjacent_box(coord)]
-                )
-            )
-
-    if strict:
-        mask = counts == to_n
-    else:
-        mask = counts >= to_n
-
-    return mask
+    # Only the cell itself is in the same row, column and box
+    cells = masks(coords, "row", size) & masks(coords, "column", size)
+    return _count_mask(np.add.reduce(cells, axis=0, dtype=np.uint8), to_n, strict)
 
 
 def argwhere(*args, **kwargs):
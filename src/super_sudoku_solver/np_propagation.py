@@ -0,0 +1,180 @@
+"""
+Constraint propagation for many boards at once using whole-array numpy operations.
+
+Boards are stacked along a new first axis so cells are (N,n,n) and candidates are (N,n,n,n)
+with indexes [board, value, row, column] (same as Candidates with the board index in front).
+Every board in a stack must be the same size n (9 for a standard board, see sizes).
+
+Only deductions that have to be true are made so the solutions of each board are unchanged.
+Easy boards are usually solved entirely, anything left can be given to a search engine.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+from super_sudoku_solver.sizes import box_size
+
+
+def _one_hot(cells: npt.NDArray[np.int8]) -> npt.NDArray[np.bool]:
+    """
+    Args:
+        cells: (N,n,n). -1 for empty cells.
+    Returns:
+        (N,n,n,n) where [board, value, row, column] is True if value is in the cell
+    """
+    values = np.arange(cells.shape[1], dtype=np.int8)
+    return cells[:, np.newaxis, :, :] == values[np.newaxis, :, np.newaxis, np.newaxis]
+
+
+def _boxes(arr: npt.NDArray[np.bool]) -> npt.NDArray[np.bool]:
+    """
+    Args:
+        arr: (N,n,n,n)
+    Returns:
+        (N,n,b,b,n) view where b is the box size with indexes [board, value, box row, box column, cell in box]
+    """
+    boards, size = arr.shape[:2]
+    box = box_size(size)
+    return (
+        arr.reshape((boards, size, box, box, box, box))
+        .transpose((0, 1, 2, 4, 3, 5))
+        .reshape((boards, size, box, box, size))
+    )
+
+
+def _house_counts(
+    arr: npt.NDArray[np.bool],
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """
+    Args:
+        arr: (N,n,n,n)
+    Returns:
+        Number of True for each value in each (row, column, box).
+        Shapes (N,n,n) [board, value, row], (N,n,n) [board, value, column]
+        and (N,n,b,b) [board, value, box row, box column]
+    """
+    return arr.sum(axis=3), arr.sum(axis=2), _boxes(arr).sum(axis=4)
+
+
+def candidates_from_cells(cells: npt.NDArray[np.int8]) -> npt.NDArray[np.bool]:
+    """
+    Args:
+        cells: (N,n,n). -1 for empty cells.
+    Returns:
+        (N,n,n,n) candidates. Every value not already in the same row, column or box as an empty cell.
+    """
+    boards, size = cells.shape[:2]
+    box = box_size(size)
+    placed = _one_hot(cells)
+
+    in_row = placed.any(axis=3, keepdims=True)
+    in_column = placed.any(axis=2, keepdims=True)
+    in_box = np.broadcast_to(
+        placed.reshape((boards, size, box, box, box, box)).any(
+            axis=(3, 5), keepdims=True
+        ),
+        (boards, size, box, box, box, box),
+    ).reshape((boards, size, size, size))
+
+    return ~(in_row | in_column | in_box) & (cells == -1)[:, np.newaxis, :, :]
+
+
+def _contradictions(
+    cells: npt.NDArray[np.int8], candidates: npt.NDArray[np.bool]
+) -> npt.NDArray[np.bool]:
+    """
+    Returns:
+        (N,) True for boards that can't be solved
+    """
+    placed = _one_hot(cells)
+
+    # A value more than once in a house
+    duplicate = np.zeros(cells.shape[0], dtype=np.bool)
+    for counts in _house_counts(placed):
+        duplicate |= (counts > 1).any(axis=tuple(range(1, counts.ndim)))
+
+    # An empty cell with no candidates
+    dead_cell = ((cells == -1) & ~candidates.any(axis=1)).any(axis=(1, 2))
+
+    # A value that can't go anywhere in a house
+    missing = np.zeros(cells.shape[0], dtype=np.bool)
+    for counts in _house_counts(placed | candidates):
+        missing |= (counts == 0).any(axis=tuple(range(1, counts.ndim)))
+
+    return duplicate | dead_cell | missing
+
+
+def propagate(
+    cells: npt.NDArray[np.int8],
+) -> tuple[npt.NDArray[np.int8], npt.NDArray[np.bool], npt.NDArray[np.bool]]:
+    """
+    Repeatedly remove candidates seen by a filled cell and fill naked and hidden singles
+    on every board until nothing changes.
+    Args:
+        cells: (N,n,n). -1 for empty cells. Not modified.
+    Returns:
+        (cells, candidates, invalid)
+        cells: (N,n,n) with every single filled
+        candidates: (N,n,n,n) candidates of the returned cells
+        invalid: (N,) True for boards found to have no solutions. Their cells and candidates are meaningless.
+    """
+    cells = np.array(cells, dtype=np.int8, copy=True)
+    if cells.ndim != 3 or cells.shape[1] != cells.shape[2]:
+        raise ValueError("Cells has invalid shape")
+    boards, size = cells.shape[:2]
+    box_size(size)  # Raises ValueError if size isn't supported
+
+    invalid = np.zeros(boards, dtype=np.bool)
+    candidates = np.zeros((boards, size, size, size), dtype=np.bool)
+
+    # PERF: boards stop changing at different times so only keep working on the ones that still are
+    active = np.arange(boards)
+    while active.size:
+        current = cells[active]
+        current_candidates = candidates_from_cells(current)
+        candidates[active] = current_candidates
+        current_invalid = _contradictions(current, current_candidates)
+        invalid[active] = current_invalid
+
+        new = _fill_singles(current, current_candidates)
+
+        # Stop working on boards that can't be solved
+        changed = (new != current).any(axis=(1, 2)) & ~current_invalid
+        cells[active[changed]] = new[changed]
+        active = active[changed]
+
+    return cells, candidates, invalid
+
+
+def _fill_singles(
+    cells: npt.NDArray[np.int8], candidates: npt.NDArray[np.bool]
+) -> npt.NDArray[np.int8]:
+    """
+    Returns:
+        Copy of cells with every naked and hidden single filled.
+        If one cell gets two values or a value is placed twice in a house the board is invalid
+        which is caught by _contradictions on the next iteration.
+    """
+    new = cells.copy()
+
+    # Naked singles: empty cells with one candidate
+    naked = (cells == -1) & (candidates.sum(axis=1) == 1)
+    new[naked] = candidates.argmax(axis=1)[naked]
+
+    # Hidden singles: values with one candidate in a house
+    row_counts, column_counts, box_counts = _house_counts(candidates)
+
+    board, value, row = np.nonzero(row_counts == 1)
+    column = candidates[board, value, row, :].argmax(axis=-1)
+    new[board, row, column] = value
+
+    board, value, column = np.nonzero(column_counts == 1)
+    row = candidates[board, value, :, column].argmax(axis=-1)
+    new[board, row, column] = value
+
+    board, value, box_row, box_column = np.nonzero(box_counts == 1)
+    box = box_size(cells.shape[1])
+    cell = _boxes(candidates)[board, value, box_row, box_column].argmax(axis=-1)
+    new[board, box * box_row + cell // box, box * box_column + cell % box] = value
+
+    return new
@@ -23,6 +23,7 @@ PUZZLE_JSON = DATA_DIR / _PUZZLES_NAME
 PUZZLE_DATA_DIR = DATA_DIR / ".data"
 GUESSES_SUFFIX = "_guesses.npy"
 CANDIDATES_SUFFIX = "_candidates.npy"
+SOLUTIONS_NAME = "solutions.json"
 
 
 CONFIG_DIR = user_config_path(APP_NAME, ensure_exists=True)
@@ -1,4 +1,4 @@
-from functools import total_ordering
+from functools import cache, total_ordering
 from jsonschema import ValidationError, validate
 from pathlib import Path
 from uuid import uuid7, UUID
@@ -16,12 +16,20 @@ from super_sudoku_solver.paths import (
     PUZZLE_JSON,
     GUESSES_SUFFIX,
     CANDIDATES_SUFFIX,
+    SOLUTIONS_NAME,
     DEFAULT_PUZZLES,
     DEFAULT_CONFIG,
     SETTINGS,
     RUNTIME_DIR,
 )
 from super_sudoku_solver.settings import settings
+from super_sudoku_solver.sizes import (
+    CLUES_PATTERN,
+    box_size,
+    format_cells,
+    parse_clues,
+    size_of,
+)
 
 from collections.abc import Callable
 from io import BufferedWriter
@@ -137,6 +145,113 @@ def atomic_write(
             logging.warning("Could not fsync directory due to error above.")
 
 
+class Solutions:
+    """
+    Solutions of puzzles keyed by their clues so a puzzle only has to be solved once.
+    Saved as a json object mapping clues to solutions, both in the format of sizes.parse_clues.
+    """
+
+    SCHEMA = {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "title": "Solutions",
+        "description": "The solution of puzzles with the given clues",
+        "type": "object",
+        "patternProperties": {
+            rf"^({CLUES_PATTERN})$": {
+                "type": "string",
+                "pattern": rf"^({CLUES_PATTERN})$",
+            }
+        },
+        "additionalProperties": False,
+    }
+
+    def __init__(self, solutions_json: Path):
+        self.solutions_json = solutions_json
+        # PERF: lazy load so puzzles that are never opened don't read the file
+        self._solutions: Optional[dict[str, str]] = None
+
+    def _read(self) -> dict[str, str]:
+        """
+        Returns:
+            Solutions in the file. Empty if there is no file or it is invalid.
+        """
+        if not self.solutions_json.is_file():
+            return {}
+
+        try:
+            with self.solutions_json.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            validate(data, self.SCHEMA)
+        except (ValueError, ValidationError) as e:
+            # Everything in it can be worked out again so a bad file is just replaced
+            logging.warning(e)
+            logging.warning("Ignoring invalid solutions file.")
+            return {}
+        return data
+
+    def _load(self) -> dict[str, str]:
+        if self._solutions is None:
+            self._solutions = self._read()
+        return self._solutions
+
+    @staticmethod
+    def _is_solution(clues: Cells, solution: Cells) -> bool:
+        """
+        Returns:
+            True if solution is a complete board that agrees with clues
+        """
+        if clues.shape != solution.shape:
+            return False
+        if np.any((clues != -1) & (clues != solution)):
+            return False
+
+        size = solution.shape[0]
+        box = box_size(size)
+        boxes = solution.reshape(box, box, box, box).swapaxes(1, 2).reshape(size, size)
+        # Every row, column and box must have every value
+        values = np.broadcast_to(np.arange(size), (size, size))
+        return all(
+            np.array_equal(np.sort(houses, axis=1), values)
+            for houses in (solution, solution.T, boxes)
+        )
+
+    def get(self, clues: str) -> Optional[Cells]:
+        """
+        Returns:
+            Saved solution for clues. None if there isn't one or it isn't a solution to clues.
+        """
+        solution = self._load().get(clues)
+        if solution is None:
+            return None
+
+        cells = parse_clues(solution)
+        if not self._is_solution(parse_clues(clues), cells):
+            logging.warning(f"Ignoring invalid saved solution for {clues}")
+            return None
+        return cells
+
+    def set(self, clues: str, solution: Cells) -> None:
+        """
+        Save solution as the solution for clues.
+        Args:
+            clues: must have only one solution
+            solution: complete board
+        """
+        # Read again so solutions saved by another process since this one loaded aren't lost
+        self._solutions = self._load() | self._read()
+        self._solutions[clues] = format_cells(solution)
+        atomic_write(json.dumps(self._solutions).encode("utf-8"), self.solutions_json)
+
+
+@cache
+def _solutions(puzzle_data_dir: Path) -> Solutions:
+    """
+    Returns:
+        The Solutions saved in puzzle_data_dir. Shared by every Puzzle in it.
+    """
+    return Solutions(puzzle_data_dir / SOLUTIONS_NAME)
+
+
 @total_ordering
 class Puzzle:
     def __init__(
@@ -154,6 +269,7 @@ class Puzzle:
 
         # In case Puzzle needs to be saved back to json
         self._str_clues = clues
+        self._size = size_of(clues)
 
         # PERF: lazy load numpy arrays
         self._clues: Optional[Cells] = None
@@ -164,6 +280,13 @@ class Puzzle:
     def str_clues(self) -> str:
         return self._str_clues
 
+    @property
+    def size(self) -> int:
+        """
+        Number of rows in the board. 9 for a standard board, see sizes.
+        """
+        return self._size
+
     # np_atomic_save = staticmethod(
     #     partial(atomic_write, save_func=lambda file, data: np.save(file, data))
     # )
@@ -175,7 +298,7 @@ class Puzzle:
 
         # Default if there is no save data
         if not self._guesses_file.is_file():
-            return np.full((9, 9), -1, dtype=np.int8)
+            return np.full((self._size, self._size), -1, dtype=np.int8)
 
         return np.load(self._guesses_file)
 
@@ -192,7 +315,7 @@ class Puzzle:
             return self._candidates.copy()
 
         if not self._candidates_file.is_file():
-            return np.full((9, 9, 9), False, dtype=np.bool)
+            return np.full((self._size,) * 3, False, dtype=np.bool)
 
         self._candidates = np.load(self._candidates_file)
         return self._candidates.copy()
@@ -205,12 +328,26 @@ class Puzzle:
     @property
     def clues(self) -> Cells:
         if self._clues is None:
-            values = [-1 if clue == "." else int(clue) - 1 for clue in self._str_clues]
-            self._clues: Cells = np.array(values, dtype=np.int8).reshape((9, 9))
+            self._clues: Cells = parse_clues(self._str_clues)
             self._clues.flags.writeable = False
 
         return self._clues.copy()
 
+    @property
+    def solution(self) -> Optional[Cells]:
+        """
+        Solution saved with set_solution(). None if it hasn't been saved.
+        Shared by every puzzle with the same clues.
+        """
+        return _solutions(self.puzzle_data_dir).get(self._str_clues)
+
+    def set_solution(self, new: Cells) -> None:
+        """
+        Args:
+            new: the only solution to the clues (ignoring guesses)
+        """
+        _solutions(self.puzzle_data_dir).set(self._str_clues, new)
+
     @property
     def has_candidates(self) -> bool:
         return self._candidates_file.is_file()
@@ -293,7 +430,7 @@ class Puzzles:
                             "clues": {
                                 "description": "The cells initially set",
                                 "type": "string",
-                                "pattern": r"^[1-9\.]{81}$",
+                                "pattern": rf"^({CLUES_PATTERN})$",
                             },
                         },
                         "additionalProperties": False,
@@ -401,7 +538,7 @@ class Puzzles:
             clues: initial state of the puzzle
             difficulty: approximate difficulty of puzzle
         """
-        if not re.fullmatch(r"[1-9\.]{81}", clues):
+        if not re.fullmatch(CLUES_PATTERN, clues):
             raise ValueError("Invalid clues")
         if difficulty not in DIFFICULTIES:
             raise ValueError("Invalid difficulty")
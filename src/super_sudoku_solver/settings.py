@@ -5,9 +5,10 @@ from dataclasses import dataclass, field
 from pathlib import Path
 import tomllib
 
+from super_sudoku_solver.custom_types import Engine
 from super_sudoku_solver.paths import SETTINGS
 
-from typing import Optional
+from typing import Optional, get_args
 
 
 # These should be immutable because hot config reloading is not supported
@@ -188,6 +189,18 @@ class Gameplay:
             raise NotImplementedError("Techniques rely on board being auto_noted")
 
 
+@dataclass(frozen=True)
+class Solver:
+    engine: Engine = field(default="dlx")
+
+    def __post_init__(self):
+        engines = get_args(Engine.__value__)
+        if self.engine not in engines:
+            raise ValueError(
+                f"Value for key engine under [solver] is invalid. Must be one of {', '.join(engines)}."
+            )
+
+
 @dataclass(frozen=True)
 class Developer:
     port: int = field(default=46215)
@@ -212,6 +225,7 @@ class Settings:
     colours: Colours = field(default_factory=lambda: Colours())
     sizes: Sizes = field(default_factory=lambda: Sizes())
     gameplay: Gameplay = field(default_factory=lambda: Gameplay())
+    solver: Solver = field(default_factory=lambda: Solver())
     developer: Developer = field(default_factory=lambda: Developer())
 
     def __post_init__(self):
@@ -225,6 +239,8 @@ class Settings:
             raise ValueError("sizes must be of type Sizes")
         if not isinstance(self.gameplay, Gameplay):
             raise ValueError("gameplay must be of type Gameplay")
+        if not isinstance(self.solver, Solver):
+            raise ValueError("solver must be of type Solver")
         if not isinstance(self.developer, Developer):
             raise ValueError("developer must be of type Developer")
 
@@ -314,6 +330,8 @@ def load_settings(path: Optional[Path] = None) -> Settings:
             user_settings["colours"] = Colours(**args)
         if "gameplay" in data:
             user_settings["gameplay"] = Gameplay(**data["gameplay"])
+        if "solver" in data:
+            user_settings["solver"] = Solver(**data["solver"])
         if "developer" in data:
             user_settings["developer"] = Developer(**data["developer"])
 
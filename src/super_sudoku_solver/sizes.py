@@ -0,0 +1,72 @@
+"""
+Board sizes.
+
+A board of size n has n rows, n columns and n boxes of box x box cells where n = box ** 2,
+and each cell has one of n values. Values are 0 to n - 1 in arrays (-1 for empty cells).
+
+Clue strings have n ** 2 characters, row after row. SYMBOLS[value] for filled cells and "." for empty ones.
+So the standard 9x9 board uses 1-9, 16x16 uses 1-9 then A-G and 25x25 uses 1-9 then A-P.
+"""
+
+from math import isqrt
+import re
+
+import numpy as np
+
+from super_sudoku_solver.custom_types import Cells
+
+# Supported board sizes
+SIZES = (9, 16, 25)
+
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+# Matches clue strings of any supported size
+CLUES_PATTERN = "|".join(
+    rf"[{re.escape(SYMBOLS[:size])}\.]{{{size * size}}}" for size in SIZES
+)
+
+
+def box_size(size: int) -> int:
+    """
+    Args:
+        size: number of rows in the board
+    Returns:
+        Number of rows in a box
+    Raises:
+        ValueError: size isn't supported
+    """
+    if size not in SIZES:
+        raise ValueError("Invalid board size")
+    return isqrt(size)
+
+
+def size_of(clues: str) -> int:
+    """
+    Returns:
+        Size of the board clues are for
+    Raises:
+        ValueError: clues aren't valid for any size
+    """
+    if not re.fullmatch(CLUES_PATTERN, clues):
+        raise ValueError("Invalid clues")
+    return isqrt(len(clues))
+
+
+def parse_clues(clues: str) -> Cells:
+    """
+    Args:
+        clues: matches CLUES_PATTERN
+    Returns:
+        nxn array. -1 for empty cells.
+    """
+    size = size_of(clues)
+    values = [SYMBOLS.find(clue) for clue in clues]  # -1 for "."
+    return np.array(values, dtype=np.int8).reshape((size, size))
+
+
+def format_cells(cells: Cells) -> str:
+    """
+    Inverse of parse_clues
+    """
+    symbols = SYMBOLS[: cells.shape[0]]
+    return "".join("." if x == -1 else symbols[x] for x in cells.flatten().tolist())
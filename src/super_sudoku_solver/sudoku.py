@@ -4,11 +4,20 @@ import super_sudoku_solver.np_candidates as npc
 
 from super_sudoku_solver.human_solver import Action
 from super_sudoku_solver.save_manager import Puzzle
+import super_sudoku_solver.bitboard_solver as bitboard
 import super_sudoku_solver.dlx_solver as dlx
+import super_sudoku_solver.sudoku_matrix as sudoku_matrix
 import super_sudoku_solver.techniques as techniques
 
-from super_sudoku_solver.custom_types import Candidates, CellCandidates, Cells, Coord
-from typing import Literal, Generator
+from super_sudoku_solver.custom_types import (
+    Candidates,
+    Cells,
+    Coord,
+    Engine,
+)
+from typing import Generator, Optional, get_args
+
+ENGINES: tuple[Engine, ...] = get_args(Engine.__value__)
 
 
 class InvalidBoard(Exception):
@@ -20,28 +29,76 @@ class Board:
     Represents board as a whole
     """
 
-    def __init__(self, puzzle: Puzzle) -> None:
-        r"""
+    def __init__(self, puzzle: Puzzle, engine: Engine = "dlx") -> None:
+        """
         Args:
-            cells: Represents starting clues. Matches regex ^[0-9\.]{81}$
+            puzzle: starting clues of any size in sizes.SIZES
+            engine: solver used by default. "dlx" is the reference, "bitboard" is faster.
         """
+        if engine not in ENGINES:
+            raise ValueError("Invalid engine")
+
         self._puzzle = puzzle
+        self._engine: Engine = engine
 
-        first = True
-        solution = None
-        for s in self.solve():
-            if not first:
-                raise InvalidBoard("Board has multiple solutions")
-            solution = s
-            first = False
+        # PERF: solutions are saved by clues so reopening a puzzle is a lookup instead of a search
+        cells = puzzle.cells
+        solution = puzzle.solution
         if solution is None:
+            # PERF: only count solutions to check uniqueness. The solution is only built once there is one.
+            count = self.count_solutions(limit=2)
+            if count == 0:
+                raise InvalidBoard("Board has no solutions")
+            if count > 1:
+                raise InvalidBoard("Board has multiple solutions")
+            solution = next(self.solve())
+
+            # With guesses the clues on their own might have other solutions
+            if np.array_equal(cells, puzzle.clues):
+                puzzle.set_solution(solution)
+        elif np.any((cells != -1) & (cells != solution)):
+            # Guesses that don't match the only solution to the clues can't be solved
             raise InvalidBoard("Board has no solutions")
-        self._solution = solution
+
+        self._solution: Cells = solution
+
+        # Whether each cell is correct: filled or has the value from the solution as a candidate.
+        # PERF: kept up to date for only the cells a change touches instead of checking the whole board each time.
+        self._correct = np.full((self.size, self.size), False, dtype=np.bool)
+        self._incorrect = self.size * self.size
+        self._update_correct()
 
     @property
-    def solution(self):
+    def size(self) -> int:
+        """
+        Number of rows in the board. 9 for a standard board, see sizes.
+        """
+        return self._puzzle.size
+
+    @property
+    def solution(self) -> Cells:
         return self._solution
 
+    def _update_correct(
+        self,
+        rows: Optional[npt.NDArray[np.intp]] = None,
+        columns: Optional[npt.NDArray[np.intp]] = None,
+    ) -> None:
+        """
+        Work out whether cells are correct again after they have been changed
+        Args:
+            rows, columns: coords of the cells that changed. None for every cell.
+        """
+        if rows is None or columns is None:
+            rows, columns = np.indices((self.size, self.size)).reshape(2, -1)
+
+        correct = (self._puzzle.cells[rows, columns] != -1) | self._puzzle.candidates[
+            self._solution[rows, columns], rows, columns
+        ]
+        self._incorrect += np.count_nonzero(self._correct[rows, columns])
+        self._incorrect -= np.count_nonzero(correct)
+        self._correct[rows, columns] = correct
+
     def add_candidates(self, candidates: Candidates) -> None:
         """
         Args:
@@ -49,64 +106,28 @@ class Board:
         """
         new = candidates | self._puzzle.candidates
         self._puzzle.set_candidates(new)
+        self._update_correct(*np.nonzero(candidates.any(axis=0)))
 
     def remove_candidates(self, candidates: Candidates) -> None:
         """
         Args:
             candidates: candidates to remove (True means remove)
+        Raises:
+            InvalidBoard: removing candidates would leave a cell that isn't correct
         """
-        # Remove candidates
-        new = (~candidates) & self._puzzle.candidates
-
-        # Check if removing those candidates is a mistake
-        def int_to_bool_arr(
-            x: Literal[0, 1, 2, 3, 4, 5, 6, 7, 8],
-        ) -> CellCandidates:
-            """
-            Args:
-                x: integer between 0 and 8 inclusive
-            Returns:
-                (9,) np.bool array where arr[x] = True and False everywhere else
-            Example:
-                int_arr_to_bool_arr(7) -> np.array([False,False,False,False,False,False,False,True,False])
-            """
-            value = np.full((9,), False, dtype=np.bool)
-            value[x] = True
-            return value
-
-        # Take a 1d int array and apply int_to_bool_arr on each element
-        # Resulting in an array of CellCandidates arrays.
-        int_arr_to_bool_arr = np.vectorize(int_to_bool_arr, signature="()->(n)")
-
-        # Take solution (2d array) and apply int_arr_to_bool_arr on each sub-array
-        # This effectively applies int_to_bool on each int in the solution, replacing it with CellCandidates arrays
-        # This results in a 3d array where axis are [row, column, value]
-        solution_candidates = (int_arr_to_bool_arr)(self._solution)
-
-        # Standard form for Candidates arrays is [value, row, column] so move axes to match
-        solution_candidates = np.moveaxis(solution_candidates, 2, 0)
-
-        # Now solution_candidates is in standard Candidates form
-        # There is exactly one candidate in each cell (the correct one)
-
-        # Candidates are correct if exactly one of these are true for every coord:
-        # 1. There is a guess at coord
-        # 2. There is a clue at coord
-        # 3. Candidates at coord contain solution value
-        x: np.ndarray[tuple[Literal[9], Literal[9]], np.dtype[np.bool]] = (
-            np.add.reduce(
-                np.array(
-                    [
-                        self._puzzle.guesses != -1,
-                        self._puzzle.clues != -1,
-                        np.add.reduce(solution_candidates & new, axis=0, dtype=np.int8)
-                        == 1,
-                    ]
-                )
-            )
-            == 1
-        )
-        if not x.all():
+        old = self._puzzle.candidates
+        new = (~candidates) & old
+
+        # Only cells losing a candidate can change and they can only go from correct to incorrect.
+        # Filled cells have no candidates so these are all empty.
+        rows, columns = np.nonzero((candidates & old).any(axis=0))
+        correct = new[self._solution[rows, columns], rows, columns]
+
+        # Candidates are correct if exactly one of these are true for every cell:
+        # 1. There is a guess in the cell
+        # 2. There is a clue in the cell
+        # 3. Candidates in the cell contain the solution value
+        if self._incorrect or not correct.all():
             raise InvalidBoard(
                 "Candidates could not be removed because it would make board unsolvable."
             )
@@ -119,6 +140,7 @@ class Board:
         new = self._puzzle.guesses.copy()
         new[row, col] = -1
         self._puzzle.set_guesses(new)
+        self._update_correct(np.array([row]), np.array([col]))
 
     @property
     def cells(self):
@@ -142,27 +164,23 @@ class Board:
     def add_cells(self, cells: Cells):
         """
         Args:
-            cells: 9x9 array where each element is between 0 and 8 inclusive. -1 to not add anything.
+            cells: nxn array where each element is between 0 and n - 1 inclusive. -1 to not add anything.
         """
         # Keep current guesses and add new ones
-        new_guesses = np.where(self._puzzle.guesses != -1, self._puzzle.guesses, cells)
-
-        # Any coord where new != -1 must be equal to solution
-        # When new == -1 it isn't a guess so that coord is always valid
-        x = np.logical_or.reduce(
-            np.array([new_guesses == -1, new_guesses == self._solution]),
-            axis=0,
-            dtype=np.bool,
-        )
-        if not x.all():
-            raise InvalidBoard("Added cells leads to unsolvable board state.")
+        guesses = self._puzzle.guesses
+        rows, columns = np.nonzero((guesses == -1) & (cells != -1))
 
-        # Set candidates to False where there are guesses
+        # Current guesses always match the solution so only the new ones need checking
+        added = cells[rows, columns]
+        if np.any(added != self._solution[rows, columns]):
+            raise InvalidBoard("Added cells leads to unsolvable board state.")
 
-        self._puzzle.set_guesses(new_guesses)
+        guesses[rows, columns] = added
+        self._puzzle.set_guesses(guesses)
 
         # Will remove candidates where guess is
         self._puzzle.set_candidates(self._puzzle.candidates)
+        self._update_correct(rows, columns)
 
     def all_normal(self, override: bool = False) -> None:
         """
@@ -172,104 +190,99 @@ class Board:
         """
         if self._puzzle.has_candidates:
             return
-        new: Candidates = np.full((9, 9, 9), True, dtype=np.bool)
+        new: Candidates = np.full((self.size,) * 3, True, dtype=np.bool)
         for coord in np.argwhere(self._puzzle.cells != -1):
             new[:, *coord] = False
         self._puzzle.set_candidates(new)
+        self._update_correct()
 
     def auto_normal(self) -> None:
         """
         Remove candidates from cells if they have a number adjacent to them
         """
-        mask = np.full((9, 9, 9), False, dtype=bool)
+        mask = np.full((self.size,) * 3, False, dtype=bool)
         cells = self._puzzle.cells
-        for cell in np.argwhere(cells != -1):
-            num = cells[*cell]
-            mask[num] = npc.adjacent(cell) | mask[num]
+        rows, columns = np.nonzero(cells != -1)
+        np.logical_or.at(
+            mask,
+            cells[rows, columns],
+            npc.adjacency_masks(self.size).adjacent[rows, columns],
+        )
 
-            # Remove all hints if a cell is there
-            mask[:, cell[0], cell[1]] = True
+        # Remove all hints if a cell is there
+        mask[:, rows, columns] = True
 
         # If candidates have already been removed keep them that way
         self._puzzle.set_candidates((~mask) & self._puzzle.candidates)
+        self._update_correct()
 
-    @staticmethod
-    def _row_add(column: int, row: int, value: int) -> list[int]:
-        """
-        Helper for create_matrix that creates a single row
-        """
-        return [
-            9 * row + column,  # Cell constraint
-            81 + 9 * row + value,  # Row constraint
-            162 + 9 * column + value,  # Column constraint
-            243 + 9 * (3 * (row // 3) + (column // 3)) + value,  # Box constraint
-        ]
-
-    def create_matrix(self) -> dlx.Matrix:
+    def create_matrix(self) -> Optional[dlx.ArrayMatrix]:
         """
-        Labels are constraints
-        Labels 0-80 one number per cell
-        Labels 81-161 each digit once per row
-        Labels 162-242 each digit once per column
-        Labels 243-323 each digit once per box
+        Returns:
+            Exact cover matrix for the board with every filled cell already selected. See sudoku_matrix.
+            None if filled cells contradict each other.
         """
-        rows = []
+        return sudoku_matrix.create_matrix(self._puzzle.cells)
 
-        x = 0
-        y = 0
-        # Number of rows = clues + 9 * (81 - clues)
-        cells = self._puzzle.cells
-        for column, row in np.argwhere(cells > -2):
-            value = cells[column, row]
-            if value != -1:
-                x += 1
-                rows.append(self._row_add(int(column), int(row), int(value)))
-            else:
-                for i in range(9):
-                    y += 1
-                    rows.append(self._row_add(int(column), int(row), i))
-
-        # Only make labels for the ones referenced in rows
-        labels = list(set(item for row in rows for item in row))
-        return dlx.Matrix(labels, rows)
-
-    @staticmethod
-    def extract_from_matrix(solution: list[list[int]]) -> npt.NDArray[np.int8]:
+    def extract_from_matrix(self, solution: list[int]) -> npt.NDArray[np.int8]:
         """
         Args:
-            solution: a list of lists of labels from DLX matrix
+            solution: rows of a solution from the matrix given by create_matrix
         Returns:
-            9x9 np.NDArray with full solution
+            nxn np.NDArray with full solution
         """
-        board: npt.NDArray = np.full((9, 9), -1, dtype=np.int8)
-
-        # Convert DLX matrix representation to 9x9 2D list[list[int]]
-        count = 0
-        for row in solution:
-            row.sort()
-            # Coordinates
-            x = row[0] % 9
-            y = row[0] // 9
-
-            value = (row[1] - 81) % 9
-            board[x][y] = value
-            count += 1
-        return board
+        return sudoku_matrix.extract(self._puzzle.cells, solution)
 
     def solve(
         self,
-        # , one_solution: bool = True
+        engine: Optional[Engine] = None,
     ) -> Generator[npt.NDArray[np.int8], None, None]:
         """
         Solve the board
+        Args:
+            engine: solver to use. None for the one the board was created with.
+        Yields:
+            Every solution
+        """
+        engine = self._engine if engine is None else engine
+
+        if engine == "bitboard":
+            yield from bitboard.generate_solutions(self._puzzle.cells)
+        elif engine == "dlx":
+            matrix = self.create_matrix()
+            if matrix is None:
+                return
+
+            for solution in matrix.generate_solution_rows():
+                yield self.extract_from_matrix(solution)
+        else:
+            raise ValueError("Invalid engine")
+
+    def count_solutions(
+        self, limit: Optional[int] = 2, engine: Optional[Engine] = None
+    ) -> int:
+        """
+        Count solutions without building them. Use this over solve() when only the number of solutions matters.
+        Args:
+            limit: stop searching once this many solutions are found. None to count all of them.
+            engine: solver to use. None for the one the board was created with.
         Returns:
-            -1 if no solutions otherwise the number of solutions.
+            Number of solutions found (at most limit)
         """
-        matrix = self.create_matrix()
-        for solution in matrix.generate_solutions():
-            yield self.extract_from_matrix(solution)
+        engine = self._engine if engine is None else engine
+
+        if engine == "bitboard":
+            return bitboard.count_solutions(self._puzzle.cells, limit)
+        elif engine == "dlx":
+            matrix = self.create_matrix()
+            if matrix is None:
+                return 0
+            return matrix.count_solutions(limit)
+        else:
+            raise ValueError("Invalid engine")
 
     def hint(self):  # -> Generator[human_solver.Technique]:
+        # Techniques only support standard 9x9 boards
         for technique in techniques.TECHNIQUES:
             technique = technique(self.candidates, self.clues, self.guesses)
             yield from technique.find()
@@ -291,10 +304,11 @@ class Board:
         Set the cells to the values they should be when solved
         """
         self._puzzle.set_guesses(
-            np.where(self._puzzle.clues != -1, self._puzzle.clues, self._solution)
+            np.where(self._puzzle.clues != -1, self._puzzle.clues, self.solution)
         )
-        self._puzzle.set_candidates(np.full((9, 9, 9), False, dtype=np.bool))
+        self._puzzle.set_candidates(np.full((self.size,) * 3, False, dtype=np.bool))
+        self._update_correct()
 
     @property
     def is_solved(self):
-        return np.array_equal(self.cells, self._solution)
+        return np.array_equal(self.cells, self.solution)
@@ -0,0 +1,86 @@
+"""
+Sudoku as an exact cover problem for dlx_solver.
+
+The matrix is the same for every puzzle of a size, only which rows are forced by clues changes.
+So it is built once per size and each board gets a cheap copy with the clue rows selected.
+
+For a board of size n (n = 9 for a standard board, see sizes) columns (labels) are constraints:
+    0 to n^2 - 1 one number per cell
+    n^2 to 2n^2 - 1 each value once per row
+    2n^2 to 3n^2 - 1 each value once per column
+    3n^2 to 4n^2 - 1 each value once per box
+Rows are candidates. The row for value in (row, column) is n^2 * row + n * column + value.
+"""
+
+import numpy as np
+import numpy.typing as npt
+import super_sudoku_solver.dlx_solver as dlx
+
+from functools import cache
+from typing import Optional
+
+from super_sudoku_solver.custom_types import Cells
+from super_sudoku_solver.sizes import box_size
+
+
+def _row_columns(size: int, row: int, column: int, value: int) -> list[int]:
+    """
+    Returns:
+        Columns the row for value at (row, column) has a node in
+    """
+    box = box_size(size)
+    area = size * size
+    return [
+        size * row + column,  # Cell constraint
+        area + size * row + value,  # Row constraint
+        2 * area + size * column + value,  # Column constraint
+        3 * area + size * (box * (row // box) + (column // box)) + value,  # Box constraint
+    ]
+
+
+@cache
+def template(size: int = 9) -> dlx.ArrayMatrix:
+    """
+    Args:
+        size: board size
+    Returns:
+        Matrix for a board with no clues. Must not be covered directly, use create_matrix() or copy() it first.
+    """
+    rows = [
+        _row_columns(size, row, column, value)
+        for row in range(size)
+        for column in range(size)
+        for value in range(size)
+    ]
+    return dlx.ArrayMatrix(list(range(4 * size * size)), rows)
+
+
+def create_matrix(cells: Cells) -> Optional[dlx.ArrayMatrix]:
+    """
+    Args:
+        cells: nxn array. -1 for empty cells.
+    Returns:
+        Copy of template() with the row for every filled cell selected.
+        None if filled cells contradict each other so there can't be any solutions.
+    """
+    size = cells.shape[0]
+    matrix = template(size).copy()
+    filled = cells != -1
+    if not matrix.select_rows(size * np.flatnonzero(filled) + cells[filled]):
+        return None
+    return matrix
+
+
+def extract(cells: Cells, rows: list[int]) -> npt.NDArray[np.int8]:
+    """
+    Args:
+        cells: the same cells given to create_matrix
+        rows: a solution from generate_solution_rows()
+    Returns:
+        nxn array with full solution
+    """
+    size = cells.shape[0]
+    board = cells.astype(np.int8, copy=True)
+    rows_arr = np.array(rows, dtype=np.intp)
+    board.flat[rows_arr // size] = rows_arr % size
+    return board
@@ -2,16 +2,17 @@
 
 import numpy as np
 import numpy.typing as npt
+import super_sudoku_solver.np_bitmasks as npb
 import super_sudoku_solver.np_candidates as npc
 
 from functools import wraps
 from itertools import combinations
 import abc
-import itertools
 
 from super_sudoku_solver.custom_types import (
     Adjacency,
     Coord,
+    Coords,
     Cells,
     CellCandidates,
     Candidates,
@@ -227,15 +228,13 @@ class NakedSingles(_TechniqueFinder):
         Yields:
             Technique
         """
+        masks = npb.pack(self._candidates)
+        nums = npb.lowest_bit(masks)
+
         # Naked singles have exactly one candidate in a cell
-        naked_singles: Cells = (
-            np.add.reduce(self._candidates, axis=0, dtype=np.int8) == 1
-        )
+        naked_singles: Cells = npb.popcount(masks) == 1
         for coord in npc.argwhere(naked_singles):
-            row, column = coord
-            num = npc.argwhere(self._candidates[:, row, column]).flatten()[0]
-
-            yield _NakedSinglesInstance(coord, num)
+            yield _NakedSinglesInstance(coord, nums[*coord])
 
 
 class _HiddenSinglesInstance(_TechniqueInstance):
@@ -315,71 +314,90 @@ class HiddenSingles(_TechniqueFinder):
         Yields:
             Technique
         """
-        types: dict[Callable, Adjacency] = {
-            npc.adjacent_row: "row",
-            npc.adjacent_column: "column",
-            npc.adjacent_box: "box",
-        }
-        for coord in npc.argwhere(self._candidates):
-            num, row, column = coord
-            for func, adjacency in types.items():
-                adjacent = func(coord[1:3]) & self._candidates[num]
-                candidates_at_cell: CellCandidates = self._candidates[:, row, column]
-
-                # Check it is single and not naked
-                if not (
-                    np.count_nonzero(adjacent) == 1
-                    and len(npc.argwhere(candidates_at_cell)) != 1
-                ):
-                    continue
+        # [house, value] number of cells in each house that can be value
+        counts = npc.house_counts(self._candidates)
+        rows, columns = np.indices((9, 9))
+        boxes = 3 * (rows // 3) + columns // 3
+
+        # [adjacency, value, row, column] cells in each house of the candidate that can be value.
+        # Adjacencies are in the order of npc.HOUSE_ADJACENCIES.
+        # PERF: counts for every candidate in all 27 houses at once instead of counting each one separately
+        in_house = np.stack(
+            (counts[rows], counts[9 + columns], counts[18 + boxes])
+        ).transpose(0, 3, 1, 2)
+
+        # Check it is single and not naked
+        naked = np.add.reduce(self._candidates, axis=0, dtype=np.int8) == 1
+        hidden = (in_house == 1) & self._candidates & ~naked
+
+        # Same order as looping over each candidate then each adjacency
+        for coord in npc.argwhere(np.moveaxis(hidden, 0, -1)):
+            yield _HiddenSinglesInstance(coord[:3], npc.HOUSE_ADJACENCIES[coord[3]])
+
+
+# Names of subsets by how many cells (or values) are in them
+_SUBSET_NAMES = {2: "Pair", 3: "Triple", 4: "Quad"}
+
+
+def _subsets(masks: list[int], count: int) -> Generator[tuple[list[int], int]]:
+    """
+    Search for count masks with only count bits set between them.
+    Masks with fewer than 2 or more than count bits set can't be part of one so are skipped.
+    Args:
+        masks: bitmasks as Python ints
+        count: number of masks in each subset
+    Yields:
+        (indexes of the masks, union of the masks) for every subset
+    """
+    # PERF: Python ints as bitmasks so extending a subset is a single | and bit_count()
+    options = [i for i, mask in enumerate(masks) if 2 <= mask.bit_count() <= count]
+
+    def extend(
+        start: int, chosen: list[int], union: int
+    ) -> Generator[tuple[list[int], int]]:
+        if len(chosen) == count:
+            if union.bit_count() == count:
+                yield chosen, union
+            return
+
+        for i in range(start, len(options) - (count - len(chosen)) + 1):
+            new = union | masks[options[i]]
+            # Prune as adding more masks can never unset bits
+            if new.bit_count() > count:
+                continue
+            yield from extend(i + 1, chosen + [options[i]], new)
 
-                yield _HiddenSinglesInstance(coord, adjacency)
+    yield from extend(0, [], 0)
 
 
-class _NakedPairsInstance(_TechniqueInstance):
-    def _get_remove_from(self):
+class _NakedSubsetInstance(_TechniqueInstance):
+    def __init__(self, cells: Coords, nums: CellCandidates, candidates: Candidates):
         """
-        Returns:
-            adjacency(s) candidates should be removed from
+        Args:
+            cells: coordinates of the cells in the subset
+            nums: mask of the values the cells are restricted to
+            candidates: candidates of the board
         """
-        remove_from = []
-        for adjacency, func in self._types.items():
-            if func(self._cell1[0:2])[*self._cell2]:
-                remove_from.append(adjacency)
-        return remove_from
-
-    def __init__(self, pair, nums, cell1, cell2, types, candidates):
-        self._pair = pair
+        self._cells = cells
         self._nums = nums
-        self._cell1 = cell1
-        self._cell2 = cell2
-        self._types = types
         self._candidates = candidates
-        self._remove_from = self._get_remove_from()
 
     @property
     @override
     def name(self):
-        return "Naked Pair"
+        return "Naked " + _SUBSET_NAMES[len(self._cells)]
 
     @override
     def _generate_message(self):
-        remove_adjacencies = self._remove_from
-        adjacencies = ""
-        for item in remove_adjacencies:
-            if len(adjacencies) == 0:
-                pass
-            else:
-                adjacencies += ", "
-
-            adjacencies += item
-
         return [
-            MessageCoords(np.array([*self._pair]), highlight=1),
+            MessageCoords(self._cells, highlight=1),
             MessageText("are"),
             MessageNums(npc.argwhere(self._nums)),
-            MessageText("so any cells adjacent to both"),
-            MessageCoords(np.array([*self._pair]), highlight=1),
+            MessageText(
+                "so any cells adjacent to "
+                + ("both" if len(self._cells) == 2 else "all of")
+            ),
+            MessageCoords(self._cells, highlight=1),
             MessageText("can have"),
             MessageNums(npc.argwhere(self._nums)),
             MessageText("removed as candidates."),
@@ -387,86 +405,122 @@ class _NakedPairsInstance(_TechniqueInstance):
 
     @override
     def _generate_action(self):
-        remove_adjacencies = self._remove_from
+        # Remove from every house all the cells share
+        shared = np.logical_or.reduce(
+            [
+                npc.seen_by(self._cells, adjacency=adjacency)
+                for adjacency in npc.HOUSE_ADJACENCIES
+            ]
+        )
         removed_candidates = np.full((9, 9, 9), False, dtype=np.bool)
-        for adjacency in remove_adjacencies:
-            removed_candidates[self._nums] |= self._types[adjacency](self._cell1[0:2])
+        removed_candidates[self._nums] = shared
 
         removed_candidates &= self._candidates
-
-        removed_candidates[:, self._cell1[0], self._cell1[1]] = False
-        removed_candidates[:, self._cell2[0], self._cell2[1]] = False
+        removed_candidates[:, self._cells[:, 0], self._cells[:, 1]] = False
 
         return Action(remove_candidates=removed_candidates)
 
 
-class NakedPairs(_TechniqueFinder):
+class _NakedSubsets(_TechniqueFinder):
+    """Helper class. Not usable directly."""
+
     def __init__(
         self,
-        candidates,
-        clues,
-        guesses,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+        count: int,
     ):
         super().__init__(candidates, clues, guesses)
 
+        if type(count) is not int:
+            raise ValueError("Invalid type for count")
+        elif count not in _SUBSET_NAMES:
+            raise ValueError(
+                "Invalid subset size. Only pairs, triples and quads allowed."
+            )
+        self.count = count
+
     @override
     def _find(self):
         """
-        Search for Naked Pairs based on candidates.
+        Search for naked subsets of self.count cells in each house.
         Yields:
             Technique
         """
-        types = {
-            "row": npc.adjacent_row,
-            "column": npc.adjacent_column,
-            "box": npc.adjacent_box,
-        }
+        masks: list[int] = npb.pack(self._candidates).flatten().tolist()
+
+        found = []
+        for house in npc.HOUSE_CELLS.tolist():
+            for subset, union in _subsets([masks[cell] for cell in house], self.count):
+                cells = [house[i] for i in subset]
+                instance = _NakedSubsetInstance(
+                    np.array([divmod(cell, 9) for cell in cells], dtype=np.int8),
+                    (union >> np.arange(9)) & 1 == 1,
+                    self._candidates,
+                )
+                found.append((cells, instance))
 
-        # Get cells where there are 2 candidates
-        coords = npc.argwhere(np.add.reduce(self._candidates, axis=0) == 2)
-        for pair in combinations(coords, r=2):
-            cell1 = pair[0]
-            cell2 = pair[1]
-            nums1 = self._candidates[:, *cell1]
-            nums2 = self._candidates[:, *cell2]
+        # Ordered by cells, not house by house, so hints come out in the same order
+        # as checking each combination of cells would give
+        found.sort(key=lambda item: item[0])
+        for _, instance in found:
+            yield instance
 
-            # If they don't have the same 2 candidates they aren't a pair
-            if nums1.tolist() != nums2.tolist():
-                continue
 
-            nums = nums1
+class NakedPairs(_NakedSubsets):
+    def __init__(
+        self,
+        candidates,
+        clues,
+        guesses,
+    ):
+        super().__init__(candidates, clues, guesses, 2)
 
-            # If they aren't adjacent they aren't a pair.
-            if not npc.adjacent(cell1[0:2])[*cell2]:
-                continue
 
-            yield _NakedPairsInstance(
-                pair,
-                nums,
-                cell1,
-                cell2,
-                types,
-                self._candidates,
-            )
+class NakedTriples(_NakedSubsets):
+    def __init__(
+        self,
+        candidates,
+        clues,
+        guesses,
+    ):
+        super().__init__(candidates, clues, guesses, 3)
+
+
+class NakedQuads(_NakedSubsets):
+    def __init__(
+        self,
+        candidates,
+        clues,
+        guesses,
+    ):
+        super().__init__(candidates, clues, guesses, 4)
 
 
-class _HiddenPairsInstance(_TechniqueInstance):
-    def __init__(self, cells, num_pair, adjacent_by):
+class _HiddenSubsetInstance(_TechniqueInstance):
+    def __init__(self, cells: Coords, nums: npt.NDArray[np.int8], adjacent_by):
+        """
+        Args:
+            cells: coordinates of the cells in the subset
+            nums: (k, 1) values only those cells can be in their houses
+            adjacent_by: adjacencies the subset is hidden in
+        """
         self._cells = cells
-        self._num_pair = num_pair
+        self._nums = nums
         self._adjacent_by = adjacent_by
 
     @property
     @override
     def name(self):
-        return "Hidden Pair"
+        return "Hidden " + _SUBSET_NAMES[len(self._nums)]
 
     @override
     def _generate_message(self):
         return [
             MessageCoords(self._cells, highlight=1),
             MessageText("are the only cells that can be"),
-            MessageNums(self._num_pair),
+            MessageNums(self._nums),
             MessageText(
                 "in their "
                 + ", ".join(self._adjacent_by)
@@ -478,90 +532,166 @@ class _HiddenPairsInstance(_TechniqueInstance):
     def _generate_action(self):
         removed_candidates = np.full((9, 9, 9), False, dtype=np.bool)
 
-        num_pair_mask = np.full((9), False, dtype=np.bool)
+        nums_mask = np.full((9), False, dtype=np.bool)
 
-        num_pair_mask[self._num_pair] = True
+        nums_mask[self._nums] = True
 
-        other_nums = npc.argwhere(~num_pair_mask)
+        other_nums = npc.argwhere(~nums_mask)
 
-        # Remove any other candidates from the 2 cells that are part of the hidden pair
+        # Remove any other candidates from the cells that are part of the hidden subset
         removed_candidates[other_nums, self._cells[:, 0], self._cells[:, 1]] = True
 
         return Action(remove_candidates=removed_candidates)
 
 
-class HiddenPairs(_TechniqueFinder):
+class _HiddenSubsets(_TechniqueFinder):
+    """Helper class. Not usable directly."""
+
     def __init__(
         self,
         candidates: npt.NDArray[np.bool],
         clues: npt.NDArray[np.int8],
         guesses: npt.NDArray[np.int8],
+        count: int,
     ):
         super().__init__(candidates, clues, guesses)
 
+        if type(count) is not int:
+            raise ValueError("Invalid type for count")
+        elif count not in _SUBSET_NAMES:
+            raise ValueError(
+                "Invalid subset size. Only pairs, triples and quads allowed."
+            )
+        self.count = count
+
     @override
     def _find(self):
         """
-        Search for Hidden Pairs based on candidates
+        Search for hidden subsets of self.count values in each house.
         Yields:
             Technique
         """
-        types = {
-            "row": npc.adjacent_row,
-            "column": npc.adjacent_column,
-            "box": npc.adjacent_box,
-        }
+        count = self.count
+
+        # [house, value] mask of the positions (in npc.HOUSE_CELLS) each value can go in the house.
+        # Packed with position as the bit axis instead of value.
+        positions: list[list[int]] = npb.pack(
+            np.moveaxis(npc.by_house(self._candidates), 1, 0)
+        ).tolist()
+
+        coords = npc.house_coords()
+        found = []
+        for house, house_positions in enumerate(positions):
+            for nums, union in _subsets(house_positions, count):
+                cells = coords[house][[i for i in range(9) if union >> i & 1]]
+                cells = cells.astype(np.int8)
+
+                # The subset can also be hidden in other houses all the cells share
+                occurences = np.logical_or.reduce(self._candidates[nums])
+                adjacent_by = [
+                    adjacency
+                    for adjacency in npc.HOUSE_ADJACENCIES
+                    if np.count_nonzero(
+                        npc.seen_by(cells, adjacency=adjacency) & occurences
+                    )
+                    == count
+                ]
 
-        # Not strictly more than 2 because if one of them is hidden it counts as a hidden pair
-        coords = npc.argwhere(np.add.reduce(self._candidates, axis=0) >= 2)
-        for pair in combinations(coords, r=2):
-            cell1 = pair[0]
-            cell2 = pair[1]
-            nums1 = self._candidates[:, *cell1]
-            nums2 = self._candidates[:, *cell2]
+                instance = _HiddenSubsetInstance(
+                    cells,
+                    np.array(nums, dtype=np.int8).reshape((count, 1)),
+                    adjacent_by,
+                )
+                found.append(((cells.tolist(), nums), instance))
 
-            common_nums_mask = nums1 & nums2
-            common_nums = npc.argwhere(common_nums_mask)
+        # Ordered by cells then values, not house by house, so hints come out in the same order
+        # as checking each combination of cells would give
+        found.sort(key=lambda item: item[0])
+        for _, instance in found:
+            yield instance
 
-            # Pairs need at least 2 common candidates
-            if len(common_nums) < 2:
-                continue
 
-            # this would make them naked
-            if np.count_nonzero(nums1 | nums2) == 2:
-                continue
+class HiddenPairs(_HiddenSubsets):
+    def __init__(
+        self,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+    ):
+        super().__init__(candidates, clues, guesses, 2)
 
-            # Pairs must be adjacent
-            if not npc.adjacent(cell1)[*cell2]:
-                continue
 
-            # Pair is hidden so all potential pairs must be checked
-            for num_pair in combinations(common_nums, r=2):
-                num_pair = np.array([*num_pair])
-                adjacent_by = []
-                for adjacency, func in types.items():
-                    # If cells are adjacent by adjacency append adjacency to adjacent_by
-                    if func(cell1)[*cell2]:
-                        adjacent_by.append(adjacency)
-
-                temp = adjacent_by.copy()
-                # 9x9 array where True means either (or both) nums are there
-                other_occurences = np.logical_or.reduce(self._candidates[num_pair])
-                for adjacency in adjacent_by:
-                    func = types[adjacency]
-                    if np.count_nonzero(func(cell1) & other_occurences) != 2:
-                        temp.remove(adjacency)
-
-                adjacent_by = temp
-
-                if len(adjacent_by) == 0:
-                    continue
+class HiddenTriples(_HiddenSubsets):
+    def __init__(
+        self,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+    ):
+        super().__init__(candidates, clues, guesses, 3)
 
-                yield _HiddenPairsInstance(
-                    np.array([cell1, cell2]),
-                    num_pair,
-                    adjacent_by,
-                )
+
+class HiddenQuads(_HiddenSubsets):
+    def __init__(
+        self,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+    ):
+        super().__init__(candidates, clues, guesses, 4)
+
+
+class _BoxLineSegments:
+    """
+    The 54 box-line segments: the 3 cells a row or column shares with a box.
+    Counts of every value in every segment, line and box are worked out at once.
+
+    Segments are indexed by [value, line, box along line] where box along line is
+    the box column for rows and the box row for columns.
+    """
+
+    def __init__(self, candidates: Candidates):
+        # [value, row, box column]
+        rows = np.add.reduce(candidates.reshape((9, 9, 3, 3)), axis=3, dtype=np.uint8)
+        # [value, column, box row]
+        columns = np.add.reduce(
+            candidates.reshape((9, 3, 3, 9)), axis=2, dtype=np.uint8
+        ).swapaxes(1, 2)
+        # [value, box row, box column]
+        boxes = np.add.reduce(rows.reshape((9, 3, 3, 3)), axis=2, dtype=np.uint8)
+
+        # (segment, line, box) counts for each segment
+        self.counts: dict[Adjacency, tuple[npt.NDArray[np.uint8], ...]] = {
+            "row": (
+                rows,
+                np.add.reduce(rows, axis=2, keepdims=True, dtype=np.uint8),
+                np.repeat(boxes, 3, axis=1),
+            ),
+            "column": (
+                columns,
+                np.add.reduce(columns, axis=2, keepdims=True, dtype=np.uint8),
+                np.repeat(boxes.swapaxes(1, 2), 3, axis=1),
+            ),
+        }
+
+    @staticmethod
+    def masks(
+        adjacency: Adjacency, line: int, box: int
+    ) -> tuple[npt.NDArray[np.bool], npt.NDArray[np.bool]]:
+        """
+        Args:
+            adjacency: "row" or "column"
+            line: index of the row or column
+            box: index of the box along the line
+        Returns:
+            (line, box) 9x9 masks of the segment's line and box
+        """
+        # Any cell of the segment has the segment's line and box
+        cell = (line, 3 * box) if adjacency == "row" else (3 * box, line)
+        return (
+            getattr(npc.ADJACENCY_MASKS, adjacency)[cell],
+            npc.ADJACENCY_MASKS.box[cell],
+        )
 
 
 class _LockedCandidatesInstance(_TechniqueInstance):
@@ -625,41 +755,35 @@ class LockedCandidates(_TechniqueFinder):
         Yields:
             Technique
         """
-        types = {"column": npc.adjacent_column, "row": npc.adjacent_row}
-        for coord in npc.argwhere(self._candidates):
-            num, row, column = coord
-            for adjacency, func in types.items():
-                # How many times candidate appears in adjacency
-                adjacency_occurences = func(coord[1:]) & self._candidates[num]
-
-                # How many of those times are in the current box
-                adjacency_box_occurences = (
-                    npc.adjacent_box(coord[1:]) & self._candidates[num]
-                )
-
-                adjacency_combined_occurences = (
-                    adjacency_occurences & adjacency_box_occurences
-                )
-
-                # If all the occurences are in the box then it is a locked candidate
-                if not (
-                    np.count_nonzero(adjacency_occurences)
-                    == np.count_nonzero(adjacency_combined_occurences)
-                ):
-                    continue
-                # If there are no candidates to remove then there's no point in yielding the technique
-                if np.count_nonzero(adjacency_box_occurences) == np.count_nonzero(
-                    adjacency_combined_occurences
-                ):
-                    continue
-
-                yield _LockedCandidatesInstance(
-                    npc.argwhere(adjacency_combined_occurences),
+        segments = _BoxLineSegments(self._candidates)
+        found = []
+        for adjacency in ("column", "row"):
+            segment, line, box = segments.counts[adjacency]
+
+            # All the occurences in the line are in the box (so in the segment)
+            # And there are other occurences in the box to remove
+            locked = (segment == line) & (segment > 0) & (box > segment)
+            for num, line_index, box_index in npc.argwhere(locked):
+                line_mask, box_mask = segments.masks(adjacency, line_index, box_index)
+                adjacency_occurences = line_mask & self._candidates[num]
+                adjacency_box_occurences = box_mask & self._candidates[num]
+                coords = npc.argwhere(adjacency_occurences)
+
+                # Ordered by value then first cell, columns before rows, so hints come out
+                # in the same order as checking each candidate in turn would give
+                key = (int(num), *coords[0].tolist(), adjacency == "row")
+                instance = _LockedCandidatesInstance(
+                    coords,
                     num,
                     adjacency,
                     adjacency_occurences,
                     adjacency_box_occurences,
                 )
+                found.append((key, instance))
+
+        found.sort(key=lambda item: item[0])
+        for _, instance in found:
+            yield instance
 
 
 class _PointingTuples(_TechniqueFinder):
@@ -681,33 +805,24 @@ class _PointingTuples(_TechniqueFinder):
         self.count = count
 
     def partially_find(self):
-        for num in range(9):
-            for coords in combinations(
-                npc.argwhere(self._candidates[num]), r=self.count
-            ):
-                coords = np.array([*coords])
-
-                # Check exactly the right number of cells with num are in box
-                # And that both coords are in the same box
-                if (
-                    np.count_nonzero(
-                        self._candidates[num] & npc.adjacent_box(coords, -1)
-                    )
-                    != self.count
-                ):
-                    continue
-
-                columns = np.count_nonzero(npc.adjacent_column(coords)) // 9
-                rows = np.count_nonzero(npc.adjacent_row(coords)) // 9
-
-                if columns == self.count and rows == 1:
-                    direction = "row"
-                elif rows == self.count and columns == 1:
-                    direction = "column"
-                else:
-                    continue
+        segments = _BoxLineSegments(self._candidates)
+        found = []
+        for direction in ("row", "column"):
+            segment, _, box = segments.counts[direction]
+
+            # Exactly the right number of cells with num are in the box and they are all in the segment
+            pointing = (segment == self.count) & (box == self.count)
+            for num, line_index, box_index in npc.argwhere(pointing):
+                line_mask, box_mask = segments.masks(direction, line_index, box_index)
+                coords = npc.argwhere(line_mask & box_mask & self._candidates[num])
+                found.append(
+                    {"coords": coords, "num": int(num), "direction": direction}
+                )
 
-                yield {"coords": coords, "num": num, "direction": direction}
+        # Ordered by value then cells, rows and columns mixed, so tuples come out
+        # in the same order as checking each combination of candidates would give
+        found.sort(key=lambda pointing: (pointing["num"], pointing["coords"].tolist()))
+        yield from found
 
 
 class _PointingTuplesInstance(_TechniqueInstance):
@@ -1012,81 +1127,82 @@ class Skyscrapers(_TechniqueFinder):
                     )
 
 
-class _XWingInstance(_TechniqueInstance):
-    def __init__(self, adjacency, pairing, num, arr) -> None:
+_FISH_NAMES = {2: "X-Wing", 3: "Swordfish", 4: "Jellyfish"}
+
+
+class _FishInstance(_TechniqueInstance):
+    def __init__(
+        self,
+        adjacency: Literal["row", "column"],
+        base: list[int],
+        cover: list[int],
+        num: int,
+        candidates: Candidates,
+    ) -> None:
+        """
+        Args:
+            adjacency: direction of the base lines. Cover lines are the other direction.
+            base: indexes of the lines num is restricted to cover in
+            cover: indexes of the lines num can be removed from
+            num: value of the fish
+            candidates: candidates of the board
+        """
         self.adjacency = adjacency
-        self.pairing = np.array(pairing).flatten()
+        self.base = base
+        self.cover = cover
         self.num = num
-        self.arr = arr
-        self.indices = np.array(npc.argwhere(self.arr).flatten(), dtype=np.int8)
+        self._candidates = candidates
 
     @property
     @override
     def name(self):
-        return "X-Wing"
+        return _FISH_NAMES[len(self.base)]
 
     @override
     def _generate_action(self):
-
         remove_candidates = np.full((9, 9, 9), False, dtype=np.bool)
 
         # Candidates will be removed in opposite direction to adjacency
+        # but not from the cells that are part of the fish
         if self.adjacency == "column":
-            remove_candidates[self.num, self.indices, :] = True
-
-            coords = itertools.product(self.indices, self.pairing)
-            for coord in coords:
-                # Don't remove candidates for the cells that are part of the X-Wing
-                remove_candidates[self.num, coord[0], coord[1]] = False
-
+            remove_candidates[self.num, self.cover, :] = True
+            remove_candidates[self.num][np.ix_(self.cover, self.base)] = False
         elif self.adjacency == "row":
-            remove_candidates[self.num, :, self.indices] = True
-
-            coords = itertools.product(self.pairing, self.indices)
-            for coord in coords:
-                # Don't remove candidates for the cells that are part of the X-Wing
-                remove_candidates[self.num, coord[0], coord[1]] = False
+            remove_candidates[self.num, :, self.cover] = True
+            remove_candidates[self.num][np.ix_(self.base, self.cover)] = False
+        else:
+            assert_never(self.adjacency)
 
         return Action(remove_candidates=remove_candidates)
 
     @override
     def _generate_message(self):
-        # Coordinates of all 4 cells
-
+        # Cells of the fish in each base line
         if self.adjacency == "row":
-            coords = np.array(
-                list(
-                    map(
-                        lambda x: np.array(list(map(np.int8, x))),
-                        itertools.product(self.pairing, self.indices),
-                    )
-                )
-            )
-            rows = list(set(coords[:, 0]))
-            group_1 = coords[coords[:, 0] == rows[0]]
-            group_2 = coords[coords[:, 0] == rows[1]]
+            groups = [
+                [(line, cover) for cover in self.cover] for line in self.base
+            ]
             other_adjacency = "column"
-
         elif self.adjacency == "column":
-            coords = np.array(
-                list(
-                    map(
-                        lambda x: np.array(list(map(np.int8, x))),
-                        itertools.product(self.indices, self.pairing),
-                    )
-                )
-            )
-            columns = list(set(coords[:, 1]))
-            group_1 = coords[coords[:, 1] == columns[0]]
-            group_2 = coords[coords[:, 1] == columns[1]]
+            groups = [
+                [(cover, line) for cover in self.cover] for line in self.base
+            ]
             other_adjacency = "row"
         else:
             assert_never(self.adjacency)
 
-        return [
-            MessageCoords(group_1, highlight=1),
-            MessageText("and"),
-            MessageCoords(group_2, highlight=2),
+        message: list[MessagePart] = []
+        for i, group in enumerate(groups):
+            if i:
+                message.append(MessageText("and"))
+            coords = np.array(
+                [coord for coord in group if self._candidates[self.num, *coord]],
+                dtype=np.int8,
+            )
+            # Alternate so neighbouring lines stand out from each other
+            message.append(MessageCoords(coords, highlight=i % 2 + 1))
+
+        return message + [
             MessageText("are the only"),
             MessageNums(self.num),
             MessageText(f"s in their {self.adjacency}s so"),
@@ -1097,57 +1213,82 @@ class _XWingInstance(_TechniqueInstance):
         ]
 
 
-class XWing(_TechniqueFinder):
+class _Fish(_TechniqueFinder):
+    """Helper class. Not usable directly."""
+
     def __init__(
         self,
         candidates: npt.NDArray[np.bool],
         clues: npt.NDArray[np.int8],
         guesses: npt.NDArray[np.int8],
+        count: int,
     ):
         super().__init__(candidates, clues, guesses)
 
+        if type(count) is not int:
+            raise ValueError("Invalid type for count")
+        elif count not in _FISH_NAMES:
+            raise ValueError(
+                "Invalid fish size. Only X-Wings, Swordfish and Jellyfish allowed."
+            )
+        self.count = count
+
     @override
     def _find(self):
         """
-        Iterator of all X-Wings based on self.candidates.
+        Search for fish of self.count lines for each value.
+        If a value can only go in count cover lines along count base lines
+        it can be removed from every other cell in the cover lines.
         Yields:
             Technique
         """
-        # only two possible cells for a value in each of two different rows,
-        # and these candidates lie also in the same columns,
-        # then all other candidates for this value in the columns can be eliminated.
-        types = {
-            "column": npc.adjacent_column,
-            "row": npc.adjacent_row,
+        # [value, base line] mask of the cover lines each value can go in along the base line.
+        # Packed with cover line as the bit axis instead of value.
+        lines = {
+            "column": npb.pack(np.moveaxis(self._candidates, 1, 0)).tolist(),
+            "row": npb.pack(np.moveaxis(self._candidates, 2, 0)).tolist(),
         }
 
-        for adjacency, func in types.items():
-            for num in range(9):
-                # Find rows or columns with 2 occurences of num. Will give 1d arr with ints representing index of row/column.
-                if adjacency == "column":
-                    rows = np.add.reduce(self._candidates[num], axis=0, dtype=np.int8)
-                    potential = npc.argwhere(rows == 2)
-                elif adjacency == "row":
-                    columns = np.add.reduce(
-                        self._candidates[num], axis=1, dtype=np.int8
+        for adjacency, masks in lines.items():
+            for num, base_masks in enumerate(masks):
+                for base, union in _subsets(base_masks, self.count):
+                    yield _FishInstance(
+                        adjacency,
+                        base,
+                        [line for line in range(9) if union >> line & 1],
+                        num,
+                        self._candidates,
                     )
-                    potential = npc.argwhere(columns == 2)
-                else:
-                    assert False, "types has invalid key"
 
-                if len(potential) < 2:
-                    continue
 
-                for pairing in combinations(potential, r=2):
-                    if adjacency == "column":
-                        arr = self._candidates[num, :, pairing]
-                    if adjacency == "row":
-                        arr = self._candidates[num, pairing, :]
+class XWing(_Fish):
+    def __init__(
+        self,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+    ):
+        super().__init__(candidates, clues, guesses, 2)
+
+
+class Swordfish(_Fish):
+    def __init__(
+        self,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+    ):
+        super().__init__(candidates, clues, guesses, 3)
 
-                    if not np.array_equal(arr[0], arr[1]):
-                        continue
 
-                    yield _XWingInstance(adjacency, pairing, num, arr[0].flatten())
+class Jellyfish(_Fish):
+    def __init__(
+        self,
+        candidates: npt.NDArray[np.bool],
+        clues: npt.NDArray[np.int8],
+        guesses: npt.NDArray[np.int8],
+    ):
+        super().__init__(candidates, clues, guesses, 4)
 
 
 # Should be in approximate order of difficulty
@@ -1159,6 +1300,12 @@ TECHNIQUES = [
     LockedCandidates,
     PointingPairs,
     PointingTriples,
+    NakedTriples,
+    HiddenTriples,
+    NakedQuads,
+    HiddenQuads,
     XWing,
+    Swordfish,
     Skyscrapers,
+    Jellyfish,
 ]
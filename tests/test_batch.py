@@ -0,0 +1,96 @@
+import pytest
+import super_sudoku_solver.batch as batch
+import super_sudoku_solver.entry_points as entry_points
+
+PUZZLES = [
+    # Unique
+    ".83..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+    # Multiple solutions
+    ".83...4..2.4..5....1..74..83.....15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+    # No solutions
+    "183..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+    # Invalid format
+    "not a puzzle",
+    # Full but invalid
+    "1" * 81,
+    # Full and valid
+    "783962415294185763615374928328496157457218396961753284849531672572649831136827549",
+    "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+]
+
+SOLUTIONS = [
+    "783962415294185763615374928328496157457218396961753284849531672572649831136827549",
+    None,
+    None,
+    None,
+    None,
+    "783962415294185763615374928328496157457218396961753284849531672572649831136827549",
+    "812753649943682175675491283154237896369845721287169534521974368438526917796318452",
+]
+
+
+@pytest.mark.parametrize("engine", ["bitboard", "dlx"])
+def test_solve_clues(engine):
+    assert batch.solve_clues(PUZZLES[0], engine) == SOLUTIONS[0]
+
+
+@pytest.mark.parametrize("engine", ["bitboard", "dlx"])
+@pytest.mark.parametrize("propagate", [True, False])
+@pytest.mark.parametrize("workers,ordered", [(1, True), (2, True), (2, False)])
+def test_solve_many(workers, ordered, propagate, engine):
+    results = list(
+        batch.solve_many(
+            PUZZLES,
+            workers=workers,
+            engine=engine,
+            ordered=ordered,
+            chunksize=2,
+            propagate=propagate,
+        )
+    )
+    if ordered:
+        assert [result.index for result in results] == list(range(len(PUZZLES)))
+    results.sort(key=lambda result: result.index)
+
+    for result, clues, solution in zip(results, PUZZLES, SOLUTIONS):
+        assert result.clues == clues
+        assert result.solution == solution
+        # Every puzzle without a solution must say why
+        assert (result.error is None) == (solution is not None)
+
+
+def test_main(tmp_path, monkeypatch, capsys):
+    file = tmp_path / "puzzles.txt"
+    file.write_text(PUZZLES[0] + "\n")
+    monkeypatch.setattr(
+        "sys.argv", ["super_sudoku_solver", "solve", str(file), "-j", "1"]
+    )
+    entry_points.main()
+    assert capsys.readouterr().out.split() == [PUZZLES[0], SOLUTIONS[0]]
+
+
+@pytest.mark.parametrize(
+    "args",
+    [["-j", "0"], ["--chunksize", "0"], ["--chunksize", "-3"], ["-j", "two"]],
+)
+def test_main_invalid_args(tmp_path, monkeypatch, capsys, args):
+    file = tmp_path / "puzzles.txt"
+    file.write_text(PUZZLES[0] + "\n")
+    monkeypatch.setattr(
+        "sys.argv", ["super_sudoku_solver", "solve", str(file), *args]
+    )
+    # Usage error instead of a traceback
+    with pytest.raises(SystemExit) as exit:
+        entry_points.main()
+    assert exit.value.code == 2
+    assert "error: argument" in capsys.readouterr().err
+
+
+def test_main_missing_file(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        "sys.argv", ["super_sudoku_solver", "solve", str(tmp_path / "missing.txt")]
+    )
+    with pytest.raises(SystemExit) as exit:
+        entry_points.main()
+    assert exit.value.code == 2
+    assert "can't open" in capsys.readouterr().err
@@ -0,0 +1,60 @@
+import pytest
+import numpy as np
+import super_sudoku_solver.bitboard_solver as bitboard
+import super_sudoku_solver.sudoku_matrix as sudoku_matrix
+
+
+def to_cells(clues: str):
+    return np.array(
+        [-1 if clue == "." else int(clue) - 1 for clue in clues], dtype=np.int8
+    ).reshape((9, 9))
+
+
+def dlx_solutions(cells):
+    matrix = sudoku_matrix.create_matrix(cells)
+    if matrix is None:
+        return []
+    return [
+        sudoku_matrix.extract(cells, rows).tolist()
+        for rows in matrix.generate_solution_rows()
+    ]
+
+
+@pytest.mark.parametrize(
+    "clues",
+    [
+        # Unique
+        ".83..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+        "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..",
+        # Multiple solutions
+        ".83...4..2.4..5....1..74..83.....15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+        # No solutions
+        "183..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+        # Clues contradict each other
+        "11" + "." * 79,
+    ],
+)
+def test_matches_dlx(clues):
+    cells = to_cells(clues)
+    solutions = [solution.tolist() for solution in bitboard.generate_solutions(cells)]
+    assert sorted(solutions) == sorted(dlx_solutions(cells))
+
+
+@pytest.mark.parametrize("limit,count", [(None, 8), (2, 2), (0, 0)])
+def test_count_solutions(limit, count):
+    # First two rows of a solved grid removed
+    cells = to_cells(
+        "...................1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5.."
+    )
+    assert len(dlx_solutions(cells)) == 8
+    assert bitboard.count_solutions(cells, limit) == count
+
+
+def test_max_nodes():
+    cells = np.full((9, 9), -1, dtype=np.int8)
+    # An empty board needs more than one node to find two solutions
+    assert bitboard.count_solutions(cells, max_nodes=1) is None
+    assert bitboard.count_solutions(cells, max_nodes=1000) == 2
+    # A complete grid is checked in one node
+    grid = next(bitboard.generate_solutions(cells))
+    assert bitboard.count_solutions(grid, max_nodes=1) == 1
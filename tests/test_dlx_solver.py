@@ -1,6 +1,10 @@
+import json
+import random
+import numpy as np
 import pytest
 from super_sudoku_solver.sudoku import Board, InvalidBoard
-from super_sudoku_solver.save_manager import Puzzle
+from super_sudoku_solver.save_manager import Puzzle, Solutions
+from super_sudoku_solver.sizes import format_cells, parse_clues
 import super_sudoku_solver.dlx_solver as dlx_solver
 from uuid import uuid7
 
@@ -20,9 +24,9 @@ def test_node(node):
     assert node.right is node.left is node.up is node.down is node
 
 
-@pytest.fixture()
-def matrix_unique_solution():
-    return dlx_solver.Matrix(
+@pytest.fixture(params=[dlx_solver.Matrix, dlx_solver.ArrayMatrix])
+def matrix_unique_solution(request):
+    return request.param(
         [1, 2, 3, 4, 5, 6, 7],
         [[1, 4, 7], [1, 4], [4, 5, 7], [3, 5, 6], [2, 3, 6, 7], [2, 7]],
     )
@@ -34,32 +38,333 @@ def test_solve_unique_solution(matrix_unique_solution):
     ]
 
 
+def test_array_matrix_matches_matrix():
+    labels = [0, 1, 2, 3, 4]
+    rows = [[0, 1], [2, 3, 4], [0, 2], [1, 3, 4], [4], [0, 1, 2, 3], [3]]
+    assert list(dlx_solver.ArrayMatrix(labels, rows).generate_solutions()) == list(
+        dlx_solver.Matrix(labels, rows).generate_solutions()
+    )
+
+
+@pytest.mark.parametrize("matrix", [dlx_solver.Matrix, dlx_solver.ArrayMatrix])
+def test_search_restores_matrix(matrix):
+    # Every solution of a 2x2 latin square, each row is [cell, row value, column value]
+    labels = list(range(12))
+    rows = [
+        [2 * row + column, 4 + 2 * row + value, 8 + 2 * column + value]
+        for row in range(2)
+        for column in range(2)
+        for value in range(2)
+    ]
+    m = matrix(labels, rows)
+    first = list(m.generate_solutions())
+    assert len(first) == 2
+    # Search must leave the matrix as it found it
+    assert list(m.generate_solutions()) == first
+
+
+@pytest.mark.parametrize("matrix", [dlx_solver.Matrix, dlx_solver.ArrayMatrix])
+@pytest.mark.parametrize("limit,count", [(None, 3), (2, 2), (1, 1), (0, 0)])
+def test_count_solutions(matrix, limit, count):
+    labels = [0, 1, 2, 3, 4]
+    rows = [[0, 1], [2, 3, 4], [0, 2], [1, 3, 4], [4], [0, 1, 2, 3], [3]]
+    m = matrix(labels, rows)
+    assert m.count_solutions(limit) == count
+    # Stopping early must not leave anything covered
+    assert len(list(m.generate_solutions())) == 3
+
+
+def test_array_matrix_select():
+    m = dlx_solver.ArrayMatrix(
+        [1, 2, 3, 4, 5, 6, 7],
+        [[1, 4, 7], [1, 4], [4, 5, 7], [3, 5, 6], [2, 3, 6, 7], [2, 7]],
+    )
+    copy = m.copy()
+    assert copy.select(5)
+    # Shares column 2 with row 5
+    assert not copy.select(4)
+    assert list(copy.generate_solution_rows()) == [[1, 3]]
+    # Original is unaffected by the copy being covered
+    assert list(m.generate_solution_rows()) == [[1, 3, 5]]
+
+
+def test_array_matrix_empty_column():
+    # A column no row covers can never be satisfied
+    assert list(dlx_solver.ArrayMatrix([1, 2], [[1]]).generate_solutions()) == []
+
+
+def queens(n):
+    """
+    n-queens as exact cover. Every rank and file must have a queen (primary)
+    but diagonals only need at most one (secondary).
+    Returns:
+        (labels, rows, secondary)
+    """
+    labels = list(range(6 * n - 2))
+    rows = [
+        [rank, n + file, 2 * n + rank + file, 5 * n - 2 + rank - file]
+        for rank in range(n)
+        for file in range(n)
+    ]
+    return labels, rows, labels[2 * n :]
+
+
+@pytest.mark.parametrize("n,count", [(6, 4), (8, 92)])
+def test_secondary_columns(n, count):
+    labels, rows, secondary = queens(n)
+
+    indptr = [4 * i for i in range(len(rows) + 1)]
+    indices = [column for row in rows for column in row]
+    matrices = [
+        dlx_solver.Matrix(labels, rows, secondary),
+        dlx_solver.ArrayMatrix(labels, rows, secondary),
+        dlx_solver.ArrayMatrix.from_csr(
+            indptr, indices, len(labels), secondary=secondary
+        ),
+    ]
+    solutions = [list(m.generate_solutions()) for m in matrices]
+    assert len(solutions[0]) == count
+    assert solutions[0] == solutions[1] == solutions[2]
+
+
+def test_select_secondary():
+    labels, rows, secondary = queens(4)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    copy = m.copy()
+    # Queen at (0, 1)
+    assert copy.select(1)
+    # Same diagonal as (0, 1)
+    assert not copy.select(4 * 1 + 2)
+    assert copy.count_solutions(None) == 1
+    assert m.count_solutions(None) == 2
+
+
+# Row 6 * rank + file is a queen at (rank, file). Rows 1, 9, 17, 18, 26 and 34 are a solution.
+@pytest.mark.parametrize("before", [[], [1]])
+@pytest.mark.parametrize("rows", [[9], [9, 17], [26, 9, 18], [9, 10], [7]])
+def test_select_rows(before, rows):
+    labels, rows_, secondary = queens(6)
+    m = dlx_solver.ArrayMatrix(labels, rows_, secondary)
+    for row in before:
+        assert m.select(row)
+
+    one_at_a_time, at_once = m.copy(), m.copy()
+    expected = all(one_at_a_time.select(row) for row in rows)
+    assert at_once.select_rows(rows) == expected
+    if expected:
+        assert list(at_once.generate_solution_rows()) == list(
+            one_at_a_time.generate_solution_rows()
+        )
+    else:
+        # Left unchanged
+        assert list(at_once.generate_solution_rows()) == list(
+            m.generate_solution_rows()
+        )
+    # Selecting the same row twice shares every column
+    assert not m.copy().select_rows([rows[0], rows[0]])
+
+
+def test_from_csr_invalid():
+    with pytest.raises(ValueError):
+        dlx_solver.ArrayMatrix.from_csr([0, 2], [0, 3], 3)
+    with pytest.raises(ValueError):
+        dlx_solver.ArrayMatrix.from_csr([0, 2, 1], [0, 1], 3)
+    with pytest.raises(ValueError):
+        dlx_solver.ArrayMatrix.from_csr([0, 1], [0, 1], 3)
+
+
+@pytest.mark.parametrize("max_updates", [1, 10, 1000])
+def test_search_budget(max_updates):
+    labels, rows, secondary = queens(6)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    expected = list(m.generate_solution_rows())
+
+    search = m.search()
+    solutions = []
+    calls = 0
+    while not search.finished:
+        solutions += search.run(max_updates=max_updates)
+        calls += 1
+    assert solutions == expected
+    assert calls > 1 or max_updates == 1000
+    assert search.run() == []
+
+
+def test_search_state():
+    labels, rows, secondary = queens(8)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    expected = list(m.generate_solution_rows())
+
+    search = m.search()
+    solutions = search.run(max_solutions=10)
+    assert solutions == expected[:10]
+
+    # Continue in a new Search from saved state
+    state = json.loads(json.dumps(search.get_state()))
+    resumed = dlx_solver.Search.from_state(m, state)
+    assert resumed.run() == expected[10:]
+    assert resumed.finished
+    assert resumed.updates > search.updates
+
+    # The original can still carry on independently
+    assert search.run() == expected[10:]
+    # Matrix is never modified
+    assert list(m.generate_solution_rows()) == expected
+
+
+def test_search_stats():
+    labels, rows, secondary = queens(6)
+    stats = [dlx_solver.SearchStats(), dlx_solver.SearchStats()]
+    dlx_solver.Matrix(labels, rows, secondary).count_solutions(None, stats[0])
+    dlx_solver.ArrayMatrix(labels, rows, secondary).count_solutions(None, stats[1])
+
+    matrix_stats, array_stats = stats
+    assert matrix_stats.solutions == 4
+    # Each solution has a queen on every rank
+    assert matrix_stats.max_depth == 6
+    # The first column is chosen once and has a row for each square on its rank or file
+    assert matrix_stats.choices[0] == 1
+    assert matrix_stats.branching_factors()[0] == 6
+    # A finished search uncovers everything it covered
+    assert matrix_stats.covers == matrix_stats.uncovers
+    assert matrix_stats.time_to_first_solution is not None
+
+    # Same search so everything but time must match
+    array_stats.time_to_first_solution = matrix_stats.time_to_first_solution
+    assert matrix_stats == array_stats
+
+
+def test_search_stats_no_solutions():
+    stats = dlx_solver.SearchStats()
+    assert dlx_solver.ArrayMatrix([1, 2], [[1]]).count_solutions(None, stats) == 0
+    assert stats.solutions == 0
+    assert stats.time_to_first_solution is None
+    assert stats.nodes == 1
+    assert stats.branches == [0]
+
+
+@pytest.mark.parametrize("matrix", [dlx_solver.Matrix, dlx_solver.ArrayMatrix])
+def test_random_search(matrix):
+    labels, rows, secondary = queens(6)
+    m = matrix(labels, rows, secondary)
+    expected = list(m.generate_solutions())
+
+    orders = []
+    for seed in range(5):
+        solutions = list(m.generate_solutions(rng=random.Random(seed)))
+        # Same solutions, possibly in a different order
+        assert sorted(map(sorted, solutions)) == sorted(map(sorted, expected))
+        orders.append(solutions)
+    assert any(order != orders[0] for order in orders)
+
+    # Seeded so it is reproducible
+    assert list(m.generate_solutions(rng=random.Random(0))) == orders[0]
+
+
+def smallest_last(right, size):
+    # Custom heuristic: the last column with the fewest rows
+    best = right[0]
+    column = right[best]
+    while column != 0:
+        if size[column] <= size[best]:
+            best = column
+        column = right[column]
+    return best
+
+
+@pytest.mark.parametrize("heuristic", ["bucket", "first", smallest_last])
+def test_heuristic(heuristic):
+    labels, rows, secondary = queens(6)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    expected = list(m.generate_solution_rows())
+
+    solutions = list(m.generate_solution_rows(heuristic=heuristic))
+    # Same solutions, possibly in a different order
+    assert sorted(map(sorted, solutions)) == sorted(map(sorted, expected))
+    assert m.count_solutions(None, heuristic=heuristic) == len(expected)
+
+    copy = m.copy()
+    assert copy.select(expected[0][0])
+    assert copy.count_solutions(None, heuristic=heuristic) == copy.count_solutions(None)
+
+    # Search must leave the matrix as it found it
+    assert list(m.generate_solution_rows(heuristic=heuristic)) == solutions
+
+
+def test_bucket_stats():
+    labels, rows, secondary = queens(6)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    mrv, bucket = dlx_solver.SearchStats(), dlx_solver.SearchStats()
+    m.count_solutions(None, stats=mrv)
+    m.count_solutions(None, stats=bucket, heuristic="bucket")
+    assert bucket.solutions == mrv.solutions == 4
+    assert bucket.covers == bucket.uncovers > 0
+    assert bucket.updates > 0
+
+
+def test_invalid_heuristic():
+    labels, rows, secondary = queens(4)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    with pytest.raises(ValueError):
+        m.count_solutions(heuristic="largest")
+
+
+@pytest.mark.parametrize("depth", [0, 1, 3, 100])
+def test_split(depth):
+    labels, rows, secondary = queens(6)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+    subproblems = m.split(depth)
+    assert all(len(prefix) <= depth for prefix in subproblems)
+
+    solutions = []
+    for prefix in subproblems:
+        copy = m.copy()
+        assert all(copy.select(row) for row in prefix)
+        solutions += [prefix + rest for rest in copy.generate_solution_rows()]
+    assert solutions == list(m.generate_solution_rows())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel(workers):
+    labels, rows, secondary = queens(8)
+    m = dlx_solver.ArrayMatrix(labels, rows, secondary)
+
+    assert dlx_solver.parallel_count_solutions(m, workers=workers) == 92
+    assert dlx_solver.parallel_count_solutions(m, workers=workers, limit=10) == 10
+    assert list(dlx_solver.parallel_solution_rows(m, workers=workers)) == list(
+        m.generate_solution_rows()
+    )
+
+
 @pytest.fixture
-def board():
+def board(tmp_path):
     puzzle = Puzzle(
         str(uuid7()),
         ".83..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
         "easy",
+        tmp_path,
     )
     return Board(puzzle)
 
 
 @pytest.fixture
-def invalid_puzzle():
+def invalid_puzzle(tmp_path):
     puzzle = Puzzle(
         str(uuid7()),
         "183..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
         "medium",
+        tmp_path,
     )
     return puzzle
 
 
 @pytest.fixture
-def multiple_solutions_puzzle():
+def multiple_solutions_puzzle(tmp_path):
     puzzle = Puzzle(
         str(uuid7()),
         ".83...4..2.4..5....1..74..83.....15...7.1...69..753.8.84....6..5...4..31136.2.5..",
         "hard",
+        tmp_path,
     )
     return puzzle
 
@@ -85,6 +390,27 @@ def test_dlx_board_solve(board):
     assert n == 1
 
 
+def test_board_count_solutions(board):
+    assert board.count_solutions(None) == 1
+
+
+def test_board_engines_agree(board):
+    assert [s.tolist() for s in board.solve(engine="bitboard")] == [
+        s.tolist() for s in board.solve(engine="dlx")
+    ]
+
+
+def test_bitboard_board(multiple_solutions_puzzle):
+    with pytest.raises(InvalidBoard):
+        Board(multiple_solutions_puzzle, engine="bitboard")
+
+
+def test_conflicting_clues_board(tmp_path):
+    puzzle = Puzzle(str(uuid7()), "11" + "." * 79, "easy", tmp_path)
+    with pytest.raises(InvalidBoard):
+        Board(puzzle)
+
+
 def test_no_solutions_board(invalid_puzzle):
     with pytest.raises(InvalidBoard):
         Board(invalid_puzzle)
@@ -93,3 +419,110 @@ def test_no_solutions_board(invalid_puzzle):
 def test_multiple_solutions_board(multiple_solutions_puzzle):
     with pytest.raises(InvalidBoard):
         Board(multiple_solutions_puzzle)
+
+
+BOARD_CLUES = (
+    ".83..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5.."
+)
+
+
+def test_saved_solution(tmp_path, monkeypatch):
+    first = Board(Puzzle(str(uuid7()), BOARD_CLUES, "Easy", tmp_path))
+    assert (tmp_path / "solutions.json").is_file()
+
+    # Reopening a puzzle with the same clues must not search again
+    def fail(*args, **kwargs):
+        raise AssertionError("searched for a saved solution")
+
+    monkeypatch.setattr(Board, "solve", fail)
+    puzzle = Puzzle(str(uuid7()), BOARD_CLUES, "Easy", tmp_path)
+    assert np.array_equal(puzzle.solution, first.solution)
+    assert np.array_equal(Board(puzzle).solution, first.solution)
+
+    # Guesses that don't match the saved solution can't be solved
+    guesses = np.full((9, 9), -1, dtype=np.int8)
+    guesses[0, 0] = (first.solution[0, 0] + 1) % 9
+    puzzle.set_guesses(guesses)
+    with pytest.raises(InvalidBoard):
+        Board(puzzle)
+
+
+def test_invalid_saved_solution(tmp_path):
+    solution = Board(Puzzle(str(uuid7()), BOARD_CLUES, "Easy", tmp_path)).solution
+    solutions_json = tmp_path / "solutions.json"
+
+    # Swapping two values keeps every house complete but no longer matches the clues
+    wrong = np.where(solution == 0, 1, np.where(solution == 1, 0, solution))
+    solutions_json.write_text(json.dumps({BOARD_CLUES: format_cells(wrong)}))
+    assert Solutions(solutions_json).get(BOARD_CLUES) is None
+
+    solutions_json.write_text("{")
+    solutions = Solutions(solutions_json)
+    assert solutions.get(BOARD_CLUES) is None
+    # A bad file is replaced
+    solutions.set(BOARD_CLUES, solution)
+    assert np.array_equal(Solutions(solutions_json).get(BOARD_CLUES), solution)
+
+
+def test_solutions_merge(tmp_path):
+    solution = Board(Puzzle(str(uuid7()), BOARD_CLUES, "Easy", tmp_path)).solution
+    solutions_json = tmp_path / "solutions.json"
+    solutions_json.unlink()
+
+    # Other clues with the same solution
+    more = parse_clues(BOARD_CLUES)
+    more[0, 0] = solution[0, 0]
+    more_clues = format_cells(more)
+
+    # Like two processes that both loaded the file before either saved
+    first, second = Solutions(solutions_json), Solutions(solutions_json)
+    assert first.get(BOARD_CLUES) is None and second.get(more_clues) is None
+    first.set(BOARD_CLUES, solution)
+    second.set(more_clues, solution)
+
+    saved = Solutions(solutions_json)
+    assert np.array_equal(saved.get(BOARD_CLUES), solution)
+    assert np.array_equal(saved.get(more_clues), solution)
+    # No temp file left behind
+    assert [path.name for path in tmp_path.iterdir()] == ["solutions.json"]
+
+
+def test_board_mistakes(tmp_path):
+    board = Board(Puzzle(str(uuid7()), BOARD_CLUES, "Easy", tmp_path))
+    board.all_normal()
+    solution = board.solution
+    row, column = np.argwhere(board.clues == -1)[0]
+    value = solution[row, column]
+    wrong = (value + 1) % 9
+
+    removed = np.full((9, 9, 9), False, dtype=np.bool)
+    removed[value, row, column] = True
+    with pytest.raises(InvalidBoard):
+        board.remove_candidates(removed)
+    assert board.candidates[value, row, column]
+
+    removed[:] = False
+    removed[wrong, row, column] = True
+    board.remove_candidates(removed)
+    assert not board.candidates[wrong, row, column]
+
+    cells = np.full((9, 9), -1, dtype=np.int8)
+    cells[row, column] = wrong
+    with pytest.raises(InvalidBoard):
+        board.add_cells(cells)
+    cells[row, column] = value
+    board.add_cells(cells)
+    assert board.cells[row, column] == value
+
+    # Removing the guess leaves the cell without its value as a candidate
+    board.remove_cell(row, column)
+    other = np.argwhere(board.cells == -1)[1]
+    removed[:] = False
+    removed[(solution[*other] + 1) % 9, *other] = True
+    with pytest.raises(InvalidBoard):
+        board.remove_candidates(removed)
+
+    board.add_candidates(board.candidates | (np.arange(9)[:, None, None] == solution))
+    board.remove_candidates(removed)
+    board.auto_solve()
+    assert board.is_solved
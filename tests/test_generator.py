@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+import pytest
+
+import super_sudoku_solver.bitboard_solver as bitboard
+import super_sudoku_solver.generator as generator
+
+
+def test_random_grid():
+    grid = generator.random_grid(random.Random(0))
+    assert (grid != -1).all()
+    assert bitboard.count_solutions(grid) == 1
+    # Seeded so it is reproducible
+    assert np.array_equal(grid, generator.random_grid(random.Random(0)))
+    assert not np.array_equal(grid, generator.random_grid(random.Random(1)))
+
+
+@pytest.mark.parametrize("symmetric", [False, True])
+def test_generate(symmetric):
+    puzzle, solution = generator.generate(seed=0, symmetric=symmetric)
+
+    assert bitboard.count_solutions(puzzle) == 1
+    assert np.array_equal(next(bitboard.generate_solutions(puzzle)), solution)
+    # Every clue that is left is needed
+    for cell in np.flatnonzero(puzzle != -1):
+        removed = puzzle.copy()
+        removed.flat[cell] = -1
+        if symmetric:
+            removed.flat[80 - cell] = -1
+        assert bitboard.count_solutions(removed) == 2
+
+    if symmetric:
+        assert np.array_equal(puzzle == -1, np.rot90(puzzle == -1, 2))
+
+
+def test_min_clues():
+    puzzle, _ = generator.generate(seed=0, min_clues=40)
+    assert np.count_nonzero(puzzle != -1) == 40
+
+
+def test_max_nodes():
+    # A 25x25 board has a clue removal that takes minutes to check without a node budget
+    puzzle, solution = generator.generate(seed=0, size=25, max_nodes=1)
+    assert bitboard.count_solutions(puzzle) == 1
+    assert np.array_equal(next(bitboard.generate_solutions(puzzle)), solution)
+
+    # Only removals that could be checked in one node were made so fewer clues are removed
+    fewer, _ = generator.generate(seed=0, max_nodes=1)
+    puzzle, _ = generator.generate(seed=0)
+    assert np.count_nonzero(fewer != -1) > np.count_nonzero(puzzle != -1)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+import super_sudoku_solver.np_bitmasks as npb
+
+
+@pytest.mark.parametrize("size", [9, 16, 25])
+def test_pack_unpack(size):
+    rng = np.random.default_rng(size)
+    candidates = rng.random((3, size, size, size)) < 0.3
+    masks = npb.pack(candidates)
+    assert masks.shape == (3, size, size)
+    assert masks.dtype == npb.mask_dtype(size)
+    assert np.array_equal(npb.unpack(masks), candidates)
+
+    assert np.array_equal(npb.popcount(masks), candidates.sum(axis=1))
+    lowest = np.where(candidates.any(axis=1), candidates.argmax(axis=1), -1)
+    assert np.array_equal(npb.lowest_bit(masks), lowest)
+
+
+def test_tables():
+    assert npb.POPCOUNT[0] == 0
+    assert npb.POPCOUNT[0b1011] == 3
+    assert npb.LOWEST_BIT[0] == -1
+    assert npb.LOWEST_BIT[0b1000] == 3
+    assert npb.LOWEST_BIT[0xFFFF] == 0
+    assert not npb.POPCOUNT.flags.writeable
+
+
+def test_houses():
+    masks = np.arange(81, dtype=np.uint16).reshape((9, 9))
+    houses = npb.houses(masks)
+    assert houses.shape == (27, 9)
+    assert houses[3].tolist() == masks[3].tolist()
+    assert houses[9 + 4].tolist() == masks[:, 4].tolist()
+    # Middle box
+    assert houses[18 + 4].tolist() == [30, 31, 32, 39, 40, 41, 48, 49, 50]
+
+
+def test_house_reductions():
+    candidates = np.full((9, 9, 9), False, dtype=np.bool)
+    candidates[0, 0, :] = True  # 1 anywhere in the first row
+    candidates[1, 0, 4] = True  # 2 only in one cell of the row
+    masks = npb.pack(candidates)
+
+    union = npb.house_union(masks)
+    unique = npb.house_unique(masks)
+    assert union.shape == unique.shape == (27,)
+    assert union[0] == 0b11
+    assert unique[0] == 0b10
+    # Only one cell in column 4 has 1 but the top middle box has three
+    assert unique[9 + 4] == 0b11
+    assert unique[18 + 1] == 0b10
+    assert union[1] == unique[1] == 0
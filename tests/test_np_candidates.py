@@ -75,3 +75,76 @@ class TestAdjacent:
         assert (
             npc.adjacent(*adjacency_args).tolist() == adjacent.tolist()
         ), "adjacent returned wrong array"
+
+
+@pytest.mark.parametrize("size", [9, 16])
+def test_adjacency_masks(size):
+    masks = npc.adjacency_masks(size)
+    for mask in masks:
+        assert mask.shape == (size,) * 4
+        assert not mask.flags.writeable
+
+    # Houses have n cells and they overlap in the cell itself and box - 1 cells of its row and column
+    assert (masks.row.sum(axis=(2, 3)) == size).all()
+    assert (masks.box.sum(axis=(2, 3)) == size).all()
+    box = int(size**0.5)
+    assert (masks.adjacent.sum(axis=(2, 3)) == 3 * size - 2 * box).all()
+
+    # Adjacency is symmetric
+    assert (masks.adjacent == masks.adjacent.transpose(2, 3, 0, 1)).all()
+    assert npc.ADJACENCY_MASKS is npc.adjacency_masks(9)
+
+
+def test_batched_masks():
+    coords = np.array([[0, 0], [4, 5], [8, 8]])
+    batched = npc.masks(coords, "box")
+    assert batched.shape == (3, 9, 9)
+    for coord, mask in zip(coords, batched):
+        assert mask.tolist() == npc.adjacent_box(coord).tolist()
+
+    with pytest.raises(ValueError):
+        npc.masks(coords, "diagonal")
+
+
+@pytest.mark.parametrize("to_n,strict", [(-1, False), (1, False), (2, True), (3, True)])
+def test_seen_by(to_n, strict):
+    # Groups of coords in the first axis
+    groups = np.array([[[0, 0], [0, 8], [2, 2]], [[4, 4], [1, 4], [4, 7]]])
+    seen = npc.seen_by(groups, to_n, strict)
+    assert seen.shape == (2, 9, 9)
+    for group, mask in zip(groups, seen):
+        assert mask.tolist() == npc.adjacent(group, to_n, strict).tolist()
+
+
+def test_house_cells():
+    houses = npc.house_cells()
+    assert houses.shape == (27, 9)
+    assert not houses.flags.writeable
+    # Every house type covers every cell once
+    for adjacency in range(3):
+        assert sorted(houses[9 * adjacency : 9 * adjacency + 9].flatten()) == list(
+            range(81)
+        )
+    assert houses[18 + 4].tolist() == [30, 31, 32, 39, 40, 41, 48, 49, 50]
+
+    # Cells in a house are adjacent to each other by the house's adjacency
+    coords = npc.house_coords()
+    for house, cells in enumerate(coords):
+        adjacency = npc.HOUSE_ADJACENCIES[house // 9]
+        assert npc.seen_by(cells, adjacency=adjacency)[*cells.T].all()
+
+
+def test_house_counts():
+    rng = np.random.default_rng(0)
+    candidates = rng.random((2, 9, 9, 9)) < 0.4
+    gathered = npc.by_house(candidates)
+    counts = npc.house_counts(candidates)
+    assert gathered.shape == (2, 27, 9, 9)
+    assert counts.shape == (2, 27, 9)
+
+    coords = npc.house_coords()
+    for house in (0, 13, 22):
+        rows, columns = coords[house].T
+        in_house = candidates[1][:, rows, columns]
+        assert gathered[1, house].tolist() == in_house.T.tolist()
+        assert counts[1, house].tolist() == in_house.sum(axis=1).tolist()
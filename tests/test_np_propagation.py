@@ -0,0 +1,54 @@
+import numpy as np
+import super_sudoku_solver.batch as batch
+import super_sudoku_solver.np_propagation as np_propagation
+
+EASY = ".83..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5.."
+EASY_SOLUTION = (
+    "783962415294185763615374928328496157457218396961753284849531672572649831136827549"
+)
+HARD = "8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4.."
+HARD_SOLUTION = (
+    "812753649943682175675491283154237896369845721287169534521974368438526917796318452"
+)
+# EASY with the first cell filled wrong
+NO_SOLUTIONS = (
+    "183..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5.."
+)
+
+
+def test_propagate():
+    cells = np.stack(
+        [batch.parse_clues(clues) for clues in (EASY, HARD, NO_SOLUTIONS)]
+    )
+    original = cells.copy()
+
+    new, candidates, invalid = np_propagation.propagate(cells)
+
+    # Input isn't modified
+    assert np.array_equal(cells, original)
+    assert invalid.tolist() == [False, False, True]
+
+    assert batch.format_cells(new[0]) == EASY_SOLUTION
+    assert not candidates[0].any()
+
+    # Not solved by singles alone but everything filled must be correct
+    hard = batch.format_cells(new[1])
+    assert "." in hard
+    assert all(x in (".", y) for x, y in zip(hard, HARD_SOLUTION))
+    # The solution is never removed as a candidate
+    solution = batch.parse_clues(HARD_SOLUTION)
+    for row, column in np.argwhere(new[1] == -1):
+        assert candidates[1, solution[row, column], row, column]
+
+
+def test_candidates_from_cells():
+    cells = np.full((1, 9, 9), -1, dtype=np.int8)
+    cells[0, 4, 4] = 0
+    candidates = np_propagation.candidates_from_cells(cells)
+
+    assert not candidates[0, :, 4, 4].any()
+    assert not candidates[0, 0, 4, :].any()
+    assert not candidates[0, 0, :, 4].any()
+    assert not candidates[0, 0, 3:6, 3:6].any()
+    assert candidates[0, 1:].sum() == 8 * 80
+    assert candidates[0, 0].sum() == 81 - 21
@@ -0,0 +1,88 @@
+from uuid import uuid7
+
+import numpy as np
+import pytest
+
+import super_sudoku_solver.batch as batch
+import super_sudoku_solver.bitboard_solver as bitboard
+import super_sudoku_solver.np_candidates as npc
+import super_sudoku_solver.np_propagation as np_propagation
+import super_sudoku_solver.sizes as sizes
+from super_sudoku_solver.save_manager import Puzzle
+from super_sudoku_solver.sudoku import Board
+
+PUZZLE_16 = "B9G..CD1...4..E...FA74.B..GD9..884..6F.AB....C.G....39...C.8B.41..4B..9...17C.G.G.8C.B..A59.647D6...1.7.4.823...375.D.8.CGE.......7....68...4E2.....9..2746......8A9....52..76.C2..4.5..D..EA.89.....14..7...FC..FBGE....8.C..3.ED..G.5F1....B..4A28..C..F3.G..6"
+SOLUTION_16 = "B9G28CD16A54F3E75CFA74EB31GD926884136F2ABE79DC5G76DE39G52CF8BA41A24B5693FD17C8GEG18C2BFEA593647D6E9D1G7C4B8235AF375FDA84CGE6291BF371CDB689AG4E25CGE598A2746F1DB3D8A94E3G52B176FC2B64F517D3CEAG899536A148G7DBEFC21FBGE26D984C573AEDC7G35F162A8B944A28B7C9EF35G1D6"
+PUZZLE_25 = "FMI6DG.K.J..O2P.EHC8N3947A5.4...M.P7H6I3.9.BDO.....E.83DC7B29K5.GI.4O.1HF6P2...G.I6.1.48CF..5..B.........3L948..1..GF.2.KI..M..3.B..2.M.IL8.A71G.4.O..D1CLJ....NP2G7.E.K.O89..IM2G..I.58...K49P..NLJEH7.87..4LGD6..J.5N2CFI3M1K.A.K.NIE.J.7..M3.HB.49GCLF2..F.O..L.64G39.M..DE.P..J..K.N..45.8MJ.B.A3.12O..61BJD5AO.3K.C..E8.9..LM.I493L28B.1M..P.HK.GN5.C7DEFG4.M..EH.FNL.1.OI..B.K.93K....M.8IA3N2EC4OGH.9BJ.L3N75F1B...I6HJ..2P.C..EK8.J.C9PDN.3G8.B..17E.6A..HLG.H.F6.25K7.A.J3I8NP.M1..I.A....9G.5PO.BD...7.3.N785.M6N3DLJO.K1F.EP.H2CA.NF4GH29..B..CD7.8O.K.LPM1....C5..G.M.4.2....7F..OK..2J.KM..C53IL.DHB.G.N.8.BDAI.O...EH.NG8CML92367J5"
+SOLUTION_25 = "FMI6DG5KAJLBO2P1EHC8N3947A514LNFMEP7H6I3K9JBDO82GCJEN83DC7B29K5MGIL4OA1HF6P2P9KGHI6O1D48CF3N57MBJALECHOB73L948EA1NJGF62PKI5DME93PBCK2HMFIL86A71GJ45ONDD1CLJ4ABFNP2G7HE5KMO8963IM2GFAI358OC1K49P6DNLJEH7B87HO4LGD69BJE5N2CFI3M1KPA5K6NIE1JP7ADM3OHB849GCLF2HAF7O82LN64G39IMKCDE5P1BJICKEN9P45D8MJFB7A3L12OGH61BJD5AOG3K2C76E8P9FHLMNI493L28BJ1MIOPAHK6GN54C7DEFG4PM67EHCFNLD15OI2JBAK893K6D1PM78IA3N2EC4OGHF9BJ5L3N75F1BOL4I6HJM92PACDGEK8OJMC9PDNK3G8FB4L17E56AI2HLGBHEF6C25K79ADJ3I8NP4M1O4I8A2JHE9G15POLBDMK67F3CN7859M6N3DLJOBK1F4EPIH2CAGNF4GH29AJB6ECD758O3KILPM16LE3C58IGHM94P2NJA17FDBOKPO2J1KMF7C53ILADHB6GEN489BDAIKO4P1EHFNG8CML92367J5"
+
+
+@pytest.mark.parametrize("clues", [PUZZLE_16, SOLUTION_25, "." * 81])
+def test_parse_clues(clues):
+    cells = sizes.parse_clues(clues)
+    assert cells.shape == (sizes.size_of(clues),) * 2
+    assert sizes.format_cells(cells) == clues
+
+
+@pytest.mark.parametrize(
+    "clues",
+    [
+        "." * 80,
+        "A" + "." * 80,  # Only 16x16 and 25x25 use letters
+        "H" + "." * 255,
+        "Q" + "." * 624,
+        "0" + "." * 80,
+    ],
+)
+def test_invalid_clues(clues):
+    with pytest.raises(ValueError):
+        sizes.parse_clues(clues)
+
+
+@pytest.mark.parametrize(
+    "puzzle,solution", [(PUZZLE_16, SOLUTION_16), (PUZZLE_25, SOLUTION_25)]
+)
+@pytest.mark.parametrize("engine", ["bitboard", "dlx"])
+def test_solve(puzzle, solution, engine):
+    assert batch.solve_clues(puzzle, engine) == solution
+
+
+def test_solve_many_mixed_sizes():
+    puzzles = [
+        PUZZLE_16,
+        ".83..241.2.4..5....1..74.283..49.15...7.1...69..753.8.84....6..5...4..31136.2.5..",
+        PUZZLE_25,
+    ]
+    results = list(batch.solve_many(puzzles, workers=1))
+    assert [result.solution for result in results] == [
+        SOLUTION_16,
+        "783962415294185763615374928328496157457218396961753284849531672572649831136827549",
+        SOLUTION_25,
+    ]
+
+
+def test_propagate():
+    cells = sizes.parse_clues(PUZZLE_16)[np.newaxis]
+    new, _, invalid = np_propagation.propagate(cells)
+    assert not invalid[0]
+    # Everything filled is correct
+    solution = sizes.parse_clues(SOLUTION_16)
+    assert ((new[0] == -1) | (new[0] == solution)).all()
+    assert (new[0] != -1).sum() > (cells[0] != -1).sum()
+
+
+def test_adjacent():
+    mask = npc.adjacent(np.array([5, 6]), size=16)
+    assert mask.shape == (16, 16)
+    # Row, column without the cell counted twice, then the 3x3 of the box not in either
+    assert mask.sum() == 16 + 15 + 9
+    assert mask[4:8, 4:8].all()
+
+
+def test_board(tmp_path):
+    board = Board(
+        Puzzle(str(uuid7()), PUZZLE_16, "Easy", tmp_path), engine="bitboard"
+    )
+    assert board.size == 16
+    assert sizes.format_cells(board.solution) == SOLUTION_16
+    assert bitboard.count_solutions(board.cells) == 1
@@ -8,6 +8,9 @@ from typing import Optional
 import numpy as np
 import numpy.typing as npt
 import super_sudoku_solver.techniques as techniques
+import super_sudoku_solver.np_candidates as npc
+import super_sudoku_solver.generator as generator
+from super_sudoku_solver.np_propagation import candidates_from_cells
 
 
 @pytest.mark.parametrize(
@@ -94,3 +97,272 @@ class TestTechnique:
             found.add(hash(technique.action))
 
         assert len(found) == num_techniques
+
+
+def open_board(subset: dict[tuple[int, int], list[int]]):
+    """
+    Returns:
+        (candidates, clues, guesses) for an empty board where every cell can be anything
+        except the cells in subset which can only be the values given
+    """
+    candidates = np.full((9, 9, 9), True, dtype=np.bool)
+    for (row, column), values in subset.items():
+        candidates[:, row, column] = False
+        candidates[values, row, column] = True
+    empty = np.full((9, 9), -1, dtype=np.int8)
+    return candidates, empty, empty.copy()
+
+
+class PerHouseHiddenSingles(techniques.HiddenSingles):
+    """HiddenSingles as it was before being vectorized, checking each candidate in each house"""
+
+    def _find(self):
+        types = {
+            npc.adjacent_row: "row",
+            npc.adjacent_column: "column",
+            npc.adjacent_box: "box",
+        }
+        for coord in npc.argwhere(self._candidates):
+            num, row, column = coord
+            for func, adjacency in types.items():
+                adjacent = func(coord[1:3]) & self._candidates[num]
+                # Check it is single and not naked
+                if (
+                    np.count_nonzero(adjacent) == 1
+                    and np.count_nonzero(self._candidates[:, row, column]) != 1
+                ):
+                    yield techniques._HiddenSinglesInstance(coord, adjacency)
+
+
+def hidden_singles_boards():
+    # Value 1 can only go in r1c1 in its row, column and box
+    candidates, clues, guesses = open_board({})
+    candidates[0, 0, :] = False
+    candidates[0, :, 0] = False
+    candidates[0, :3, :3] = False
+    candidates[0, 0, 0] = True
+    yield candidates, clues, guesses
+
+    for seed in range(3):
+        puzzle, solution = generator.generate(seed=seed)
+        candidates = candidates_from_cells(puzzle[np.newaxis])[0]
+        # Remove some wrong candidates so more values are hidden
+        wrong = candidates & (np.arange(9)[:, np.newaxis, np.newaxis] != solution)
+        wrong &= np.random.default_rng(seed).random(wrong.shape) < 0.5
+        candidates[wrong] = False
+        yield candidates, puzzle, np.full((9, 9), -1, dtype=np.int8)
+
+
+@pytest.mark.parametrize("board", list(hidden_singles_boards()))
+def test_hidden_singles(board):
+    def found(technique, find):
+        return [
+            (found.raw_message, found.action.cells.tolist())
+            for found in find(technique(*board))
+        ]
+
+    def find_all(finder):
+        return (instance.technique for instance in finder._find())
+
+    # Every house a value is hidden in, in the same order
+    assert found(techniques.HiddenSingles, find_all) == found(
+        PerHouseHiddenSingles, find_all
+    )
+    # So the same ones are kept after duplicates are removed
+    assert found(techniques.HiddenSingles, techniques.HiddenSingles.find) == found(
+        PerHouseHiddenSingles, PerHouseHiddenSingles.find
+    )
+
+
+@pytest.mark.parametrize(
+    "technique,subset,houses",
+    [
+        # Row 0 and box 0
+        (
+            techniques.NakedTriples,
+            {(0, 0): [0, 1], (0, 1): [1, 2], (0, 2): [0, 2]},
+            [(0, slice(None)), (slice(0, 3), slice(0, 3))],
+        ),
+        # Column 5 only
+        (
+            techniques.NakedQuads,
+            {(0, 5): [4, 5], (3, 5): [5, 6], (6, 5): [6, 7], (8, 5): [4, 7]},
+            [(slice(None), 5)],
+        ),
+    ],
+)
+def test_naked_subsets(technique, subset, houses):
+    candidates, clues, guesses = open_board(subset)
+    found = list(technique(candidates, clues, guesses).find())
+    assert len(found) == 1
+
+    values = sorted({value for cell in subset.values() for value in cell})
+    expected = np.full((9, 9, 9), False, dtype=np.bool)
+    for value in values:
+        for house in houses:
+            expected[value][house] = True
+    for row, column in subset:
+        expected[:, row, column] = False
+
+    assert np.array_equal(found[0].action.candidates, expected)
+
+    # No two of the cells are a pair
+    assert list(techniques.NakedPairs(candidates, clues, guesses).find()) == []
+
+
+@pytest.mark.parametrize(
+    "technique,values,columns",
+    [
+        (techniques.HiddenTriples, [0, 1, 2], [0, 1, 2]),
+        (techniques.HiddenQuads, [2, 4, 6, 8], [0, 3, 4, 8]),
+    ],
+)
+def test_hidden_subsets(technique, values, columns):
+    # values can only go in columns of the first row
+    candidates, clues, guesses = open_board({})
+    others = [column for column in range(9) if column not in columns]
+    for value in values:
+        candidates[value, 0, others] = False
+
+    found = list(technique(candidates, clues, guesses).find())
+    assert len(found) == 1
+    assert found[0].raw_message.endswith(
+        "in their row so we can remove all other candidates from them."
+    )
+
+    expected = np.full((9, 9, 9), False, dtype=np.bool)
+    other_values = [value for value in range(9) if value not in values]
+    for column in columns:
+        expected[other_values, 0, column] = True
+    assert np.array_equal(found[0].action.candidates, expected)
+
+    assert list(techniques.HiddenPairs(candidates, clues, guesses).find()) == []
+
+
+def test_naked_pairs_order():
+    # A pair that only shares row 5 and a pair that only shares box 1
+    candidates, clues, guesses = open_board(
+        {(4, 0): [0, 1], (4, 5): [0, 1], (1, 1): [2, 3], (2, 2): [2, 3]}
+    )
+
+    found = list(techniques.NakedPairs(candidates, clues, guesses).find())
+    # By cells, not all rows then all boxes
+    assert [technique.raw_message.split(" are ")[0] for technique in found] == [
+        " Cells r2c2 r3c3",
+        " Cells r5c1 r5c6",
+    ]
+
+
+def test_hidden_pairs_order():
+    candidates, clues, guesses = open_board({})
+    # 1 and 2 can only go in r5c1 and r5c6 in row 5
+    row = [column for column in range(9) if column not in (0, 5)]
+    candidates[np.ix_([0, 1], [4], row)] = False
+    # 3 and 4 can only go in r2c2 and r3c3 in box 1
+    box = np.zeros((9, 9), dtype=np.bool)
+    box[:3, :3] = True
+    box[1, 1] = box[2, 2] = False
+    candidates[2][box] = False
+    candidates[3][box] = False
+
+    found = list(techniques.HiddenPairs(candidates, clues, guesses).find())
+    # By cells, not all rows then all boxes
+    assert [technique.raw_message.split(" are ")[0] for technique in found] == [
+        " Cells r2c2 r3c3",
+        " Cells r5c1 r5c6",
+    ]
+
+
+def test_locked_candidates_order():
+    candidates, clues, guesses = open_board({})
+    # 1 can only go in the box 1 part of row 2, box 8 part of column 5 and box 7 part of row 8
+    candidates[0, 1, 3:] = False
+    candidates[0, :6, 4] = False
+    candidates[0, 7, 3:] = False
+    # 2 can only go in the box 1 part of column 1
+    candidates[1, 3:, 0] = False
+
+    found = list(techniques.LockedCandidates(candidates, clues, guesses).find())
+    # By value then first cell, not all columns then all rows
+    assert [technique.raw_message.split(" are ")[0] for technique in found] == [
+        " Cells r2c1 r2c2 r2c3",
+        " Cells r7c5 r9c5",
+        " Cells r8c1 r8c2 r8c3",
+        " Cells r1c1 r2c1 r3c1",
+    ]
+    assert ["in their row" in technique.raw_message for technique in found] == [
+        True,
+        False,
+        True,
+        False,
+    ]
+
+
+def test_pointing_pairs_order():
+    candidates, clues, guesses = open_board({})
+    # 1 can only go in a pair in each of boxes 1, 2 and 5
+    for rows, columns, pair in (
+        (slice(0, 3), slice(0, 3), (0, slice(1, 3))),
+        (slice(0, 3), slice(3, 6), (slice(0, 2), 4)),
+        (slice(3, 6), slice(3, 6), (4, slice(3, 5))),
+    ):
+        candidates[0, rows, columns] = False
+        candidates[0][pair] = True
+
+    found = list(techniques.PointingPairs(candidates, clues, guesses).find())
+    # By value then cells, not all rows then all columns
+    assert [technique.raw_message.split(" are ")[0] for technique in found] == [
+        " Cells r1c2 r1c3",
+        " Cells r1c5 r2c5",
+        " Cells r5c4 r5c5",
+    ]
+    assert [
+        "share a row" in technique.raw_message for technique in found
+    ] == [True, False, True]
+
+
+@pytest.mark.parametrize(
+    "technique,base,cover",
+    [
+        (techniques.XWing, [1, 6], [2, 7]),
+        (techniques.Swordfish, [0, 4, 8], [1, 3, 5]),
+        (techniques.Jellyfish, [0, 2, 5, 7], [0, 4, 6, 8]),
+    ],
+)
+@pytest.mark.parametrize("adjacency", ["row", "column"])
+def test_fish(technique, base, cover, adjacency):
+    # 0 can only go in the cover lines along each base line
+    candidates, clues, guesses = open_board({})
+    other = [line for line in range(9) if line not in cover]
+    for line in base:
+        candidates[0, line, other] = False
+    # Bigger fish don't need every base line to have all the cover lines
+    if len(base) > 2:
+        candidates[0, base[0], cover[0]] = False
+    if adjacency == "column":
+        candidates[0] = candidates[0].T.copy()
+
+    other_adjacency = "column" if adjacency == "row" else "row"
+    found = list(technique(candidates, clues, guesses).find())
+    assert len(found) == 1
+    assert found[0].raw_message.endswith(
+        f"s in their {adjacency}s so number 1 can be removed as a candidate"
+        f" from all other cells in their {other_adjacency}s."
+    )
+
+    expected = np.full((9, 9), False, dtype=np.bool)
+    expected[:, cover] = True
+    expected[base] = False
+    if adjacency == "column":
+        expected = expected.T
+    assert np.array_equal(found[0].action.candidates[0], expected)
+    assert not found[0].action.candidates[1:].any()
+
+    # Smaller fish can't be found in the same lines
+    if technique is not techniques.XWing:
+        assert list(techniques.XWing(candidates, clues, guesses).find()) == []
+
+
+def test_invalid_fish_size():
+    with pytest.raises(ValueError):
+        techniques._Fish(*open_board({}), 5)